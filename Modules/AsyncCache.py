@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+import asyncio
+
+
+class AsyncTTLCache:
+    """
+    Size-bounded LRU cache whose entries carry their own time-to-live.
+
+    ``get_or_set`` deduplicates concurrent misses for the same key: the first
+    caller runs the factory and everyone else awaits the same task.
+
+    With ``stale_ttl`` set, an expired entry is kept for that many more
+    seconds; ``get_or_set`` returns it immediately and refreshes it in the
+    background (stale-while-revalidate).
+    """
+
+    def __init__(self, maxsize: int = 256, stale_ttl: float = 0) -> None:
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict[Hashable, tuple[float, float, Any]] = OrderedDict()
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _lookup(self, key: Hashable) -> tuple[Optional[Any], bool]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None, False
+
+        expires_at, stale_until, value = entry
+        now = monotonic()
+        if stale_until < now:
+            del self._entries[key]
+            return None, False
+
+        self._entries.move_to_end(key)
+        return value, expires_at >= now
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value, fresh = self._lookup(key)
+        return value if fresh else None
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+
+        expires_at = monotonic() + ttl
+        self._entries[key] = (expires_at, expires_at + self.stale_ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """
+        Drops one entry, or every entry when no key is given.
+        """
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    async def _run(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[tuple[Any, float]]],
+    ) -> Any:
+        try:
+            value, ttl = await factory()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def get_or_set(
+        self,
+        key: Hashable,
+        factory: Callable[[], Awaitable[tuple[Any, float]]],
+    ) -> Any:
+        """
+        Returns the cached value for ``key`` or computes it with ``factory``.
+        A stale value is returned as is while ``factory`` refreshes it.
+
+        Args:
+            key (Hashable): The cache key.
+            factory (Callable): Coroutine factory returning ``(value, ttl)``.
+                A ttl of 0 or less returns the value without caching it.
+
+        Returns:
+            Any: The cached or freshly computed value.
+        """
+        value, fresh = self._lookup(key)
+        if value is not None and fresh:
+            return value
+
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._run(key, factory))
+            task.add_done_callback(lambda task: task.cancelled() or task.exception())
+            self._in_flight[key] = task
+
+        if value is not None:
+            return value
+        return await asyncio.shield(task)
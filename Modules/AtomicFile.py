@@ -0,0 +1,31 @@
+from contextlib import contextmanager
+from os import path, remove, replace
+from tempfile import NamedTemporaryFile
+from typing import IO, Iterator
+
+
+@contextmanager
+def atomic_write(file_path: str, mode: str = "w") -> Iterator[IO]:
+    """
+    Opens a temporary file next to ``file_path`` that replaces it once the
+    block exits cleanly, so readers never see a partially written file. If
+    the block raises, the temporary file is removed and ``file_path`` is left
+    untouched.
+
+    Args:
+        file_path (str): The file to write.
+        mode (str, optional): ``"w"`` for text or ``"wb"`` for bytes.
+
+    Yields:
+        IO: The temporary file to write to.
+    """
+    f = NamedTemporaryFile(
+        mode, dir=path.dirname(file_path) or ".", suffix=".tmp", delete=False
+    )
+    try:
+        with f:
+            yield f
+    except BaseException:
+        remove(f.name)
+        raise
+    replace(f.name, file_path)
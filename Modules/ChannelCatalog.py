@@ -0,0 +1,298 @@
+from bisect import bisect_left
+from itertools import count
+from typing import Optional
+
+import re
+
+from Modules.ChannelList import ChannelRecord
+
+IMG_CATCHUP = "http://jiotv.catchup.cdn.jio.com/dare_images/images/"
+
+LANGUAGES = {
+    6: "English",
+    1: "Hindi",
+    2: "Marathi",
+    3: "Punjabi",
+    4: "Urdu",
+    5: "Bengali",
+    7: "Malayalam",
+    8: "Tamil",
+    9: "Gujarati",
+    10: "Odia",
+    11: "Telugu",
+    12: "Bhojpuri",
+    13: "Kannada",
+    14: "Assamese",
+    15: "Nepali",
+    16: "French",
+}
+
+GENRES = {
+    8: "Sports",
+    5: "Entertainment",
+    6: "Movies",
+    12: "News",
+    13: "Music",
+    7: "Kids",
+    9: "Lifestyle",
+    10: "Infotainment",
+    15: "Devotional",
+    16: "Business",
+    17: "Educational",
+    18: "Shopping",
+    19: "JioDarshan",
+}
+
+_versions = count(1)
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lower-cased word tokens.
+    """
+    return _TOKEN.findall(text.lower())
+
+
+def _id_table(mapping, fallback: dict[int, str]) -> dict[int, str]:
+    table = dict(fallback)
+    if isinstance(mapping, dict):
+        for key, name in mapping.items():
+            try:
+                table[int(key)] = str(name)
+            except (TypeError, ValueError):
+                continue
+    return table
+
+
+def dictionary_tables(dictionary: dict) -> tuple[dict[int, str], dict[int, str]]:
+    """
+    Builds the genre and language tables from the upstream dictionary.
+
+    Args:
+        dictionary (dict): The dictionary endpoint response.
+
+    Returns:
+        tuple[dict[int, str], dict[int, str]]: The genre and language tables,
+            keyed by upstream ID, with ``GENRES`` and ``LANGUAGES`` filling in
+            any ID the dictionary does not name.
+    """
+    return (
+        _id_table(dictionary.get("channelCategoryMapping"), GENRES),
+        _id_table(dictionary.get("languageIdMapping"), LANGUAGES),
+    )
+
+
+class Channel:
+    """
+    One channel of the catalog, shared by the playlist, EPG, UI and API.
+
+    Uses ``__slots__`` so each channel carries no per-instance ``__dict__``.
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "logo",
+        "genre",
+        "language",
+        "hd",
+        "catchup",
+        "number",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        logo: str,
+        genre: str,
+        language: str,
+        hd: bool,
+        catchup: bool,
+        number: Optional[int],
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.logo = logo
+        self.genre = genre
+        self.language = language
+        self.hd = hd
+        self.catchup = catchup
+        self.number = number
+
+    def __repr__(self) -> str:
+        return f"Channel(id={self.id!r}, name={self.name!r})"
+
+    def play_url(self, host: str) -> str:
+        return f"http://{host}/jiotv/m3u8?cid={self.id}"
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class ChannelCatalog:
+    """
+    Immutable, indexed view of the upstream channel list.
+
+    Built once per channel list refresh; an inverted index of the suffixes
+    of every name token and per-genre, per-language, HD and catchup indexes
+    are precomputed so filtered lookups only touch the matching channels.
+    """
+
+    def __init__(
+        self,
+        channels: list[ChannelRecord],
+        genres: dict[int, str] = GENRES,
+        languages: dict[int, str] = LANGUAGES,
+    ) -> None:
+        self.version = next(_versions)
+        self.channels: list[Channel] = []
+        self._names: list[str] = []
+        self._by_token: dict[str, list[int]] = {}
+        self._by_genre: dict[str, list[int]] = {}
+        self._by_language: dict[str, list[int]] = {}
+        self._hd: set[int] = set()
+        self._catchup: set[int] = set()
+
+        for channel in channels:
+            index = len(self.channels)
+            genre = genres.get(channel.category, "Unknown")
+            language = languages.get(channel.language, "Unknown")
+
+            self.channels.append(
+                Channel(
+                    id=channel.id,
+                    name=channel.name,
+                    logo=IMG_CATCHUP + channel.logo,
+                    genre=genre,
+                    language=language,
+                    hd=channel.hd,
+                    catchup=channel.catchup,
+                    number=channel.number,
+                )
+            )
+            self._names.append(channel.name.lower())
+            suffixes = dict.fromkeys(
+                token[start:]
+                for token in tokenize(channel.name)
+                for start in range(len(token))
+            )
+            for suffix in suffixes:
+                self._by_token.setdefault(suffix, []).append(index)
+            self._by_genre.setdefault(genre.lower(), []).append(index)
+            self._by_language.setdefault(language.lower(), []).append(index)
+            if channel.hd:
+                self._hd.add(index)
+            if channel.catchup:
+                self._catchup.add(index)
+
+        self._by_id = {
+            channel.id: index for index, channel in enumerate(self.channels)
+        }
+        self._tokens = sorted(self._by_token)
+
+    def __len__(self) -> int:
+        return len(self.channels)
+
+    @property
+    def genres(self) -> list[str]:
+        return sorted({channel.genre for channel in self.channels})
+
+    @property
+    def languages(self) -> list[str]:
+        return sorted({channel.language for channel in self.channels})
+
+    def get(self, channel_id: int) -> Optional[Channel]:
+        index = self._by_id.get(int(channel_id))
+        return None if index is None else self.channels[index]
+
+    def _prefixed(self, prefix: str) -> set[int]:
+        tokens = self._tokens
+        matches = set()
+        position = bisect_left(tokens, prefix)
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            matches.update(self._by_token[tokens[position]])
+            position += 1
+        return matches
+
+    def search(self, query: str) -> list[int]:
+        """
+        Returns the indexes of the channels matching a name query.
+
+        Matches exactly the names containing the query as a case-insensitive
+        substring. Such a name contains every word token of the query within
+        one of its own tokens, so the inverted index of token suffixes narrows
+        the candidates with one prefix lookup per query token, and only those
+        are checked. Queries without word characters scan all names.
+
+        Args:
+            query (str): The search query.
+
+        Returns:
+            list[int]: The matching channel indexes, in upstream order.
+        """
+        query = query.lower()
+        names = self._names
+        candidates = None
+        for token in dict.fromkeys(tokenize(query)):
+            prefixed = self._prefixed(token)
+            candidates = prefixed if candidates is None else candidates & prefixed
+            if not candidates:
+                return []
+
+        if candidates is None:
+            return [index for index, name in enumerate(names) if query in name]
+        return [index for index in sorted(candidates) if query in names[index]]
+
+    def filter(
+        self,
+        query: Optional[str] = None,
+        genre: Optional[str] = None,
+        language: Optional[str] = None,
+        hd: Optional[bool] = None,
+        catchup: Optional[bool] = None,
+    ) -> list[Channel]:
+        """
+        Returns the channels matching every given filter, in upstream order.
+
+        Args:
+            query (str, optional): Name query, matched by ``search``.
+            genre (str, optional): Genre name, case-insensitive.
+            language (str, optional): Language name, case-insensitive.
+            hd (bool, optional): Only HD, or only SD, channels.
+            catchup (bool, optional): Only channels with, or without, catchup.
+
+        Returns:
+            list[Channel]: The matching channels.
+        """
+        indexes: Optional[list[int]] = None
+
+        if query:
+            indexes = self.search(query)
+        for value, table in (
+            (genre, self._by_genre),
+            (language, self._by_language),
+        ):
+            if not value:
+                continue
+            matches = table.get(value.lower(), [])
+            if indexes is None:
+                indexes = matches
+            else:
+                matches = set(matches)
+                indexes = [index for index in indexes if index in matches]
+
+        if indexes is None:
+            indexes = range(len(self.channels))
+
+        if hd is not None:
+            indexes = [index for index in indexes if (index in self._hd) == hd]
+        if catchup is not None:
+            indexes = [
+                index for index in indexes if (index in self._catchup) == catchup
+            ]
+
+        channels = self.channels
+        return [channels[index] for index in indexes]
@@ -0,0 +1,83 @@
+from typing import AsyncIterator, NamedTuple, Optional
+
+import json
+
+import ijson
+from httpx import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class ChannelRecord(NamedTuple):
+    """
+    The fields of an upstream channel the catalog is built from.
+    """
+
+    id: int
+    name: str
+    logo: str
+    category: int
+    language: int
+    hd: bool
+    catchup: bool
+    number: Optional[int]
+
+
+def loads(data: bytes):
+    """
+    Decodes JSON with orjson when it is installed.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def channel_record(channel: dict) -> ChannelRecord:
+    return ChannelRecord(
+        id=int(channel["channel_id"]),
+        name=channel["channel_name"],
+        logo=channel["logoUrl"],
+        category=int(channel["channelCategoryId"]),
+        language=int(channel["channelLanguageId"]),
+        hd=bool(channel.get("isHD")),
+        catchup=bool(channel.get("isCatchupAvailable")),
+        number=channel.get("stbChannelNumber"),
+    )
+
+
+class _BodyReader:
+    # Adapts a streamed response body to the async file interface of ijson.
+    def __init__(self, chunks: AsyncIterator[bytes]) -> None:
+        self._chunks = chunks
+
+    async def read(self, size: int = -1) -> bytes:
+        if size == 0:
+            return b""
+        async for chunk in self._chunks:
+            if chunk:
+                return chunk
+        return b""
+
+
+async def read_channel_list(resp: Response) -> list[ChannelRecord]:
+    """
+    Parses the channel list from a streamed ``CHANNELS_SRC_NEW`` response.
+
+    The body is parsed incrementally with ijson and each channel object is
+    dropped as soon as its record is built, so neither the raw body nor the
+    full object graph is held at once.
+
+    Args:
+        resp (Response): The streamed response.
+
+    Returns:
+        list[ChannelRecord]: The channels, in upstream order.
+    """
+    reader = _BodyReader(resp.aiter_bytes())
+    return [
+        channel_record(channel)
+        async for channel in ijson.items_async(reader, "result.item")
+    ]
@@ -0,0 +1,93 @@
+from typing import Optional
+
+from pyDes import des, ECB, PAD_PKCS5
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, modes
+
+    try:
+        from cryptography.hazmat.decrepit.ciphers.algorithms import TripleDES
+    except ImportError:
+        from cryptography.hazmat.primitives.ciphers.algorithms import TripleDES
+except ImportError:
+    TripleDES = None
+
+BLOCK_SIZE = 8
+
+
+def _unpad(data: bytes) -> bytes:
+    # Strips PKCS#5 padding the way pyDes does, without validating it.
+    return data[: -data[-1]] if data else data
+
+
+class PyDesBackend:
+    """
+    Pure-Python DES-ECB decryption with pyDes, always available.
+    """
+
+    name = "pyDes"
+
+    def __init__(self, key: bytes) -> None:
+        self.cipher = des(key, ECB, b"\0" * BLOCK_SIZE, pad=None, padmode=PAD_PKCS5)
+
+    def decrypt(self, data: bytes) -> bytes:
+        return self.cipher.decrypt(data, padmode=PAD_PKCS5)
+
+    def decrypt_many(self, items: list[bytes]) -> list[bytes]:
+        return [self.decrypt(data) for data in items]
+
+
+class CryptographyBackend:
+    """
+    DES-ECB decryption through OpenSSL, using ``cryptography``'s TripleDES
+    with the key repeated three times, which is equivalent to single DES.
+
+    ECB decrypts every block independently, so ``decrypt_many`` runs a whole
+    batch through one decryptor call and splits the result afterwards.
+    """
+
+    name = "cryptography"
+
+    def __init__(self, key: bytes) -> None:
+        self.cipher = Cipher(TripleDES(key * 3), modes.ECB())
+
+    def _decrypt_blocks(self, data: bytes) -> bytes:
+        decryptor = self.cipher.decryptor()
+        return decryptor.update(data) + decryptor.finalize()
+
+    def decrypt(self, data: bytes) -> bytes:
+        return _unpad(self._decrypt_blocks(data))
+
+    def decrypt_many(self, items: list[bytes]) -> list[bytes]:
+        if any(len(data) % BLOCK_SIZE for data in items):
+            return [self.decrypt(data) for data in items]
+
+        plain = self._decrypt_blocks(b"".join(items))
+        results = []
+        offset = 0
+        for data in items:
+            results.append(_unpad(plain[offset : offset + len(data)]))
+            offset += len(data)
+        return results
+
+
+BACKENDS = {"cryptography": CryptographyBackend, "pyDes": PyDesBackend}
+
+
+def select_backend(key: bytes, name: Optional[str] = None):
+    """
+    Returns a DES decryption backend for ``key``.
+
+    Args:
+        key (bytes): The 8 byte DES key.
+        name (str, optional): ``cryptography`` or ``pyDes``. Defaults to
+            ``cryptography`` when it is installed.
+
+    Returns:
+        CryptographyBackend | PyDesBackend: The decryption backend.
+    """
+    if name is None:
+        name = "cryptography" if TripleDES is not None else "pyDes"
+    if name == "cryptography" and TripleDES is None:
+        name = "pyDes"
+    return BACKENDS[name](key)
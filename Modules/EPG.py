@@ -0,0 +1,362 @@
+from bisect import bisect_right
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta, timezone
+from logging import Logger
+from time import time
+from typing import AsyncIterator, Awaitable, Callable, NamedTuple, Optional
+from xml.sax.saxutils import escape, quoteattr
+
+import asyncio
+import zlib
+
+from httpx import AsyncClient, Request, Response
+
+from Modules.ChannelCatalog import ChannelCatalog
+
+# Upstream guide days are calendar days in Indian Standard Time.
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class Programme(NamedTuple):
+    start: int
+    stop: int
+    title: str
+    description: str
+    category: str
+    poster: str
+    srno: str
+
+
+class ChannelGuide:
+    """
+    Programmes of one channel, bucketed by guide day and merged into a
+    start-time sorted sequence for bisect lookups.
+    """
+
+    __slots__ = ("days", "starts", "programmes")
+
+    def __init__(self) -> None:
+        self.days: dict[date, tuple[float, list[Programme]]] = {}
+        self.starts: list[int] = []
+        self.programmes: list[Programme] = []
+
+    def rebuild(self) -> None:
+        programmes = []
+        for day in sorted(self.days):
+            for programme in self.days[day][1]:
+                if not programmes or programme.start >= programmes[-1].stop:
+                    programmes.append(programme)
+        self.programmes = programmes
+        self.starts = [programme.start for programme in programmes]
+
+    def at(self, timestamp: float) -> Optional[Programme]:
+        """
+        Returns the programme airing at ``timestamp`` (Unix seconds), if any.
+        """
+        index = bisect_right(self.starts, timestamp) - 1
+        if index >= 0 and self.programmes[index].stop > timestamp:
+            return self.programmes[index]
+        return None
+
+
+def _xmltv_time(timestamp: int) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        "%Y%m%d%H%M%S +0000"
+    )
+
+
+class EPGStore:
+    """
+    Fetches and indexes the programme guide of every channel.
+
+    ``source`` is the per-channel guide URL template, formatted with the day
+    offset and channel ID; ``poster_base`` prefixes programme poster names.
+    ``send``, called with a request factory, sends the guide requests, so
+    they can be retried after a token refresh.
+
+    Guide days are fetched with bounded concurrency over the shared client
+    and refreshed incrementally: past days are fetched once, today and future
+    days are re-fetched only once they are older than ``day_ttl``, and days
+    that fall out of the window are dropped.
+    """
+
+    def __init__(
+        self,
+        client: AsyncClient,
+        headers: Callable[[], dict],
+        source: str,
+        poster_base: str,
+        logger: Logger,
+        send: Optional[Callable[..., Awaitable[Response]]] = None,
+        past_days: int = 1,
+        future_days: int = 1,
+        concurrency: int = 16,
+        refresh_interval: float = 3600,
+        day_ttl: float = 12 * 3600,
+    ) -> None:
+        self.client = client
+        self.headers = headers
+        self.source = source
+        self.poster_base = poster_base
+        self.logger = logger
+        self.send = send
+        self.past_days = past_days
+        self.future_days = future_days
+        self.concurrency = concurrency
+        self.refresh_interval = refresh_interval
+        self.day_ttl = day_ttl
+
+        self.guides: dict[int, ChannelGuide] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        self._on_demand: dict[tuple[int, date], asyncio.Task] = {}
+
+    async def _send(self, build_request: Callable[[], Request]) -> Response:
+        if self.send is None:
+            return await self.client.send(build_request())
+        return await self.send(build_request)
+
+    def guide(self, channel_id: int) -> Optional[ChannelGuide]:
+        return self.guides.get(int(channel_id))
+
+    async def _fetch_day(
+        self,
+        channel_id: int,
+        offset: int,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> Optional[list[Programme]]:
+        async with semaphore or nullcontext():
+            try:
+                url = self.source.format(offset, channel_id)
+                resp = await self._send(
+                    lambda: self.client.build_request(
+                        "GET", url, headers=self.headers()
+                    )
+                )
+                if resp.status_code != 200:
+                    return None
+                entries = resp.json().get("epg") or []
+            except Exception:
+                return None
+
+        programmes = []
+        for entry in entries:
+            try:
+                programmes.append(
+                    Programme(
+                        start=int(entry["startEpoch"]) // 1000,
+                        stop=int(entry["endEpoch"]) // 1000,
+                        title=str(entry.get("showname") or ""),
+                        description=str(entry.get("description") or ""),
+                        category=str(entry.get("showCategory") or ""),
+                        poster=str(entry.get("episodePoster") or ""),
+                        srno=str(entry.get("srno") or ""),
+                    )
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+        programmes.sort()
+        return programmes
+
+    async def _fill_day(
+        self,
+        channel_id: int,
+        day: date,
+        semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> bool:
+        offset = (day - datetime.now(IST).date()).days
+        programmes = await self._fetch_day(channel_id, offset, semaphore)
+        if programmes is None:
+            return False
+
+        guide = self.guides.setdefault(channel_id, ChannelGuide())
+        guide.days[day] = (time(), programmes)
+        guide.rebuild()
+        return True
+
+    async def refresh(self, channel_ids: list[int]) -> None:
+        """
+        Brings the guide of every channel up to date, fetching only the
+        guide days that are missing or stale. Each guide day is usable as
+        soon as it has been fetched.
+
+        Args:
+            channel_ids (list[int]): The channels to keep guides for.
+        """
+        now = time()
+        today = datetime.now(IST).date()
+        window = [
+            today + timedelta(days=offset)
+            for offset in range(-self.past_days, self.future_days + 1)
+        ]
+
+        wanted = {int(channel_id) for channel_id in channel_ids}
+        for channel_id in list(self.guides):
+            if channel_id not in wanted:
+                del self.guides[channel_id]
+
+        jobs = []
+        for channel_id in wanted:
+            guide = self.guides.setdefault(channel_id, ChannelGuide())
+            expired = [day for day in guide.days if day not in window]
+            for day in expired:
+                del guide.days[day]
+            if expired:
+                guide.rebuild()
+
+            for day in window:
+                fetched = guide.days.get(day)
+                if fetched is not None and (
+                    day < today or now - fetched[0] < self.day_ttl
+                ):
+                    continue
+                jobs.append((channel_id, day))
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *[self._fill_day(channel_id, day, semaphore) for channel_id, day in jobs]
+        )
+
+        failed = results.count(False)
+        if failed:
+            self.logger.warning(
+                f"[!] EPG fetch failed for {failed} of {len(jobs)} channel days"
+            )
+
+    async def programme_at(
+        self, channel_id: int, timestamp: float
+    ) -> Optional[Programme]:
+        """
+        Returns the programme of a channel airing at ``timestamp``.
+
+        If the background fill has not loaded that guide day yet, only that
+        channel and day are fetched, so a lookup never waits on the whole
+        guide. Concurrent lookups of the same day share one fetch.
+
+        Args:
+            channel_id (int): The channel ID.
+            timestamp (float): Unix seconds.
+
+        Returns:
+            Optional[Programme]: The programme, if the guide has one.
+        """
+        channel_id = int(channel_id)
+        day = datetime.fromtimestamp(timestamp, IST).date()
+        guide = self.guides.get(channel_id)
+        if guide is None or day not in guide.days:
+            key = (channel_id, day)
+            task = self._on_demand.get(key)
+            if task is None:
+                task = asyncio.create_task(self._fill_day(channel_id, day))
+                self._on_demand[key] = task
+                task.add_done_callback(lambda _: self._on_demand.pop(key, None))
+            await asyncio.shield(task)
+            guide = self.guides.get(channel_id)
+        return guide.at(timestamp) if guide is not None else None
+
+    async def _run(self, get_catalog: Callable[[], Awaitable[ChannelCatalog]]):
+        while True:
+            try:
+                catalog = await get_catalog()
+                await self.refresh([channel.id for channel in catalog.channels])
+            except Exception as e:
+                self.logger.warning(f"[!] EPG refresh failed: {e}")
+            finally:
+                self._ready.set()
+            await asyncio.sleep(self.refresh_interval)
+
+    def start(self, get_catalog: Callable[[], Awaitable[ChannelCatalog]]) -> None:
+        """
+        Starts the background refresh loop, unless it is already running.
+
+        Args:
+            get_catalog (Callable): Coroutine function returning the catalog.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(get_catalog))
+
+    async def ensure_loaded(
+        self,
+        get_catalog: Callable[[], Awaitable[ChannelCatalog]],
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Starts the background refresh loop on first use and waits for the
+        initial fill, for at most ``timeout`` seconds.
+
+        Args:
+            get_catalog (Callable): Coroutine function returning the catalog.
+            timeout (float, optional): Longest wait, after which whatever has
+                been loaded so far is used.
+        """
+        self.start(get_catalog)
+        try:
+            await asyncio.wait_for(asyncio.shield(self._ready.wait()), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def iter_xmltv(
+        self, catalog: ChannelCatalog, compress: bool = False
+    ) -> AsyncIterator[bytes]:
+        """
+        Streams the guide as an XMLTV document.
+
+        Args:
+            catalog (ChannelCatalog): Provides channel names and logos.
+            compress (bool): Whether to gzip the stream.
+
+        Yields:
+            bytes: Successive pieces of the document.
+        """
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def _encode(parts):
+            data = "".join(parts).encode("utf-8")
+            return compressor.compress(data) if compressor else data
+
+        yield _encode(
+            ['<?xml version="1.0" encoding="UTF-8"?>\n<tv generator-info-name="JioTV Proxy">\n']
+        )
+
+        parts = []
+        for channel in catalog.channels:
+            parts.append(
+                f'<channel id="{channel.id}"><display-name>{escape(channel.name)}</display-name>'
+                f'<icon src={quoteattr(channel.logo)}/></channel>\n'
+            )
+        yield _encode(parts)
+
+        for channel in catalog.channels:
+            guide = self.guides.get(channel.id)
+            if guide is None or not guide.programmes:
+                continue
+
+            parts = []
+            for programme in guide.programmes:
+                parts.append(
+                    f'<programme start="{_xmltv_time(programme.start)}" stop="{_xmltv_time(programme.stop)}" channel="{channel.id}">'
+                    f"<title>{escape(programme.title)}</title>"
+                    f"<desc>{escape(programme.description)}</desc>"
+                )
+                if programme.category:
+                    parts.append(f"<category>{escape(programme.category)}</category>")
+                if programme.poster:
+                    parts.append(
+                        f"<icon src={quoteattr(self.poster_base + programme.poster)}/>"
+                    )
+                parts.append("</programme>\n")
+
+            chunk = _encode(parts)
+            if chunk:
+                yield chunk
+            await asyncio.sleep(0)
+
+        tail = _encode(["</tv>\n"])
+        if compressor:
+            tail += compressor.flush()
+        yield tail
@@ -0,0 +1,130 @@
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import httpx
+from starlette.responses import Response, StreamingResponse
+
+# Upstream headers forwarded on proxied, possibly partial, responses.
+PROXY_HEADERS = (
+    "content-type",
+    "content-length",
+    "content-range",
+    "content-encoding",
+    "accept-ranges",
+    "etag",
+    "last-modified",
+)
+
+
+class RangeNotSatisfiable(ValueError):
+    """
+    Raised when a ``Range`` header selects no byte of the resource.
+    """
+
+    def __init__(self, size: int) -> None:
+        super().__init__(f"Range not satisfiable for {size} bytes")
+        self.size = size
+
+
+def parse_range(value: Optional[str], size: int) -> Optional[tuple[int, int]]:
+    """
+    Parses a single-range ``Range`` header against a resource size.
+
+    Args:
+        value (str, optional): The ``Range`` request header.
+        size (int): The full size of the resource in bytes.
+
+    Returns:
+        Optional[tuple[int, int]]: The inclusive first and last byte, or None
+            if there is no usable range and the whole resource should be sent.
+
+    Raises:
+        RangeNotSatisfiable: If the range starts past the end of the resource.
+    """
+    if not value:
+        return None
+    unit, _, spec = value.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+
+    if start < 0 or (last and end < start):
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable(size)
+    return start, min(end, size - 1)
+
+
+def content_range(start: int, end: int, size: int) -> str:
+    return f"bytes {start}-{end}/{size}"
+
+
+def range_not_satisfiable(size: int) -> Response:
+    return Response(status_code=416, headers={"content-range": f"bytes */{size}"})
+
+
+async def proxy_response(
+    open_stream: Callable[[str, Optional[str]], Awaitable[httpx.Response]],
+    method: str = "GET",
+    range_header: Optional[str] = None,
+    media_type: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+    max_age: int = 0,
+    public: bool = False,
+    tee: Optional[Callable[[httpx.Response], AsyncIterator[bytes]]] = None,
+) -> Response:
+    """
+    Proxies one upstream request without caching it, forwarding ``Range`` and
+    answering ``HEAD`` without reading a body.
+
+    Args:
+        open_stream (Callable): Called with the method and ``Range`` header,
+            returns a streamed ``httpx.Response``.
+        method (str): ``GET`` or ``HEAD``.
+        range_header (str, optional): The client's ``Range`` header.
+        media_type (str, optional): Used when upstream sends no content type.
+        chunk_size (int, optional): Size of the chunks relayed to the client.
+        max_age (int): ``Cache-Control`` max-age for successful responses.
+        public (bool): Let shared caches store successful responses.
+        tee (Callable, optional): Called with a 200 upstream response to
+            produce the body instead, e.g. to also write it to a cache. It
+            has to close the response.
+
+    Returns:
+        Response: The upstream status and headers with the raw upstream body.
+    """
+    resp = await open_stream(method, range_header)
+    headers = {
+        name: resp.headers[name] for name in PROXY_HEADERS if name in resp.headers
+    }
+    headers.setdefault("content-type", media_type or "application/octet-stream")
+    if resp.status_code in (200, 206) and max_age > 0:
+        scope = "public" if public else "private"
+        headers["cache-control"] = f"{scope}, max-age={max_age}"
+    else:
+        headers["cache-control"] = "private, no-store"
+
+    if method == "HEAD" or resp.status_code in (204, 304, 416):
+        await resp.aclose()
+        return Response(status_code=resp.status_code, headers=headers)
+
+    async def _body():
+        try:
+            async for chunk in resp.aiter_raw(chunk_size):
+                yield chunk
+        finally:
+            await resp.aclose()
+
+    body = tee(resp) if tee is not None and resp.status_code == 200 else _body()
+    return StreamingResponse(body, status_code=resp.status_code, headers=headers)
@@ -1,7 +1,12 @@
-from typing import Union
+from collections import OrderedDict
+from typing import Any, Callable, Optional, Union
 from httpx import AsyncClient, Limits
+from pydantic import TypeAdapter
+from os import path, environ
+import asyncio
 import base64
-from pyDes import des, ECB, PAD_PKCS5
+from Modules.AsyncCache import AsyncTTLCache
+from Modules.DESBackend import select_backend
 from models.JioSaavn import (
     HomeModels,
     AlbumDetailsModel,
@@ -11,21 +16,181 @@ from models.JioSaavn import (
     PlaylistDetailsModel,
 )
 
+SONG_CACHE_DIR = path.join("data", "song_cache")
+# Disk space for proxied song audio, 0 disables the cache.
+SONG_CACHE_MAX_BYTES = int(
+    environ.get("JIOSAAVN_SONG_CACHE_MAX_BYTES", 2 * 1024 * 1024 * 1024)
+)
+# Whether the web player streams songs through /jio_saavn/stream.
+PROXY_STREAMS = environ.get("JIOSAAVN_PROXY_STREAMS", "0") == "1"
+
+
+# Seconds each api.php call is cached for; other calls are cached for
+# API_CACHE_DEFAULT_TTL. Expired responses are served for up to
+# API_CACHE_STALE_TTL more seconds while they are refreshed in the background.
+API_CACHE_TTLS = {
+    "content.getHomepageData": 15 * 60,
+    "content.getAlbumDetails": 60 * 60,
+    "artist.getArtistPageDetails": 30 * 60,
+    "song.getDetails": 60 * 60,
+    "playlist.getDetails": 15 * 60,
+}
+API_CACHE_DEFAULT_TTL = 10 * 60
+API_CACHE_STALE_TTL = 60 * 60
+API_CACHE_SIZE = 1024
+
+# Songs per batched song.getDetails call, and batches fetched at once.
+SONG_BATCH_SIZE = 50
+SONG_BATCH_CONCURRENCY = 4
+
+# Search results are validated as whole lists in one call.
+SEARCH_RESULTS = {
+    SearchModel.SearchModes.SONGS: TypeAdapter(list[SearchModel.Song]),
+    SearchModel.SearchModes.ALBUMS: TypeAdapter(list[SearchModel.Album]),
+    SearchModel.SearchModes.ARTISTS: TypeAdapter(list[SearchModel.Artist]),
+    SearchModel.SearchModes.PLAYLISTS: TypeAdapter(list[SearchModel.Playlist]),
+}
+
+# Media URLs are encrypted with a fixed DES key. JIOSAAVN_DES_BACKEND picks
+# "cryptography" or "pyDes"; the fastest installed one is used by default.
+DES_KEY = b"38346591"
+DES_BACKEND = select_backend(DES_KEY, environ.get("JIOSAAVN_DES_BACKEND"))
+DECRYPT_CACHE_SIZE = 4096
+
+_decrypted: OrderedDict[str, str] = OrderedDict()
+
+
+def _remember(url: str, dec_url: str) -> None:
+    _decrypted[url] = dec_url
+    if len(_decrypted) > DECRYPT_CACHE_SIZE:
+        _decrypted.popitem(last=False)
+
+
+def _stream_url(plain: bytes) -> str:
+    return plain.decode("utf-8").replace("_96.mp4", "_320.mp4")
+
+
+def decrypt_url(url: str) -> str:
+    """
+    Decrypts an ``encrypted_media_url`` into the 320kbps stream URL.
+
+    Results are memoized per encrypted URL in an LRU of
+    ``DECRYPT_CACHE_SIZE`` entries, so songs that appear in many responses
+    are only decrypted once.
+
+    Args:
+        url (str): The base64 encoded, DES encrypted media URL.
+
+    Returns:
+        str: The decrypted stream URL.
+    """
+    dec_url = _decrypted.get(url)
+    if dec_url is not None:
+        _decrypted.move_to_end(url)
+        return dec_url
+
+    dec_url = _stream_url(DES_BACKEND.decrypt(base64.b64decode(url.strip())))
+    _remember(url, dec_url)
+    return dec_url
+
+
+def decrypt_urls(urls: list[str]) -> list[str]:
+    """
+    Decrypts a list of media URLs, running the ones not memoized yet through
+    the backend as a single batch.
+
+    Args:
+        urls (list[str]): Base64 encoded, DES encrypted media URLs.
+
+    Returns:
+        list[str]: The decrypted stream URLs, in the same order.
+    """
+    missing = list(dict.fromkeys(url for url in urls if url not in _decrypted))
+    decrypted = {}
+    if missing:
+        plain = DES_BACKEND.decrypt_many(
+            [base64.b64decode(url.strip()) for url in missing]
+        )
+        for url, data in zip(missing, plain):
+            decrypted[url] = _stream_url(data)
+            _remember(url, decrypted[url])
+    return [decrypted.get(url) or decrypt_url(url) for url in urls]
+
+
+def _cache_key(request_params: dict, cookies: Optional[dict] = None) -> tuple:
+    return (
+        tuple(sorted(request_params.items())),
+        (cookies or {}).get("L"),
+    )
+
+
+def _song_params(pids: str) -> dict:
+    return {
+        "__call": "song.getDetails",
+        "cc": "in",
+        "pids": pids,
+        "_format": "json",
+        "_marker": "0",
+    }
+
 
 class JioSaavnApi:
     def __init__(self) -> None:
-        self.des_cipher = des(
-            b"38346591", ECB, b"\0\0\0\0\0\0\0\0", pad=None, padmode=PAD_PKCS5
-        )
         self.jio_api_base_url = "https://www.jiosaavn.com/api.php"
         self.client = AsyncClient(limits=Limits(max_keepalive_connections=20, max_connections=50))
+        self.cache = AsyncTTLCache(maxsize=API_CACHE_SIZE, stale_ttl=API_CACHE_STALE_TTL)
+        self._prefetches: set[asyncio.Task] = set()
+
+    async def _api_call(
+        self,
+        request_params: dict,
+        build: Callable[[dict], Any],
+        cookies: Optional[dict] = None,
+    ) -> Any:
+        """
+        Calls ``api.php`` through the shared response cache.
+
+        Responses are keyed on the call, its parameters and the language
+        cookie, cached for the call's ``API_CACHE_TTLS`` entry, and concurrent
+        identical calls share one request.
+
+        Args:
+            request_params (dict): The query parameters, including ``__call``.
+            build (Callable): Turns the decoded JSON response into the result.
+            cookies (dict, optional): Request cookies.
+
+        Returns:
+            Any: The built result.
+        """
+        key = _cache_key(request_params, cookies)
+        ttl = API_CACHE_TTLS.get(request_params["__call"], API_CACHE_DEFAULT_TTL)
+
+        async def _fetch():
+            resp = await self.client.get(
+                self.jio_api_base_url, cookies=cookies, params=request_params
+            )
+            return build(resp.json()), ttl
+
+        return await self.cache.get_or_set(key, _fetch)
 
     def decrypt_url(self, url: str) -> str:
-        enc_url = base64.b64decode(url.strip())
+        return decrypt_url(url)
 
-        dec_url = self.des_cipher.decrypt(enc_url, padmode=PAD_PKCS5).decode("utf-8")
-        dec_url = dec_url.replace("_96.mp4", "_320.mp4")
-        return dec_url
+    def open_song(self, url: str, method: str = "GET", range_header: str = None):
+        """
+        Opens a streamed request for song audio on the CDN.
+
+        Args:
+            url (str): The decrypted stream URL.
+            method (str): ``GET`` or ``HEAD``.
+            range_header (str, optional): A ``Range`` header to forward.
+
+        Returns:
+            Awaitable[httpx.Response]: The streamed response.
+        """
+        headers = {"Range": range_header} if range_header else {}
+        request = self.client.build_request(method, url, headers=headers)
+        return self.client.send(request, stream=True)
 
     async def home_page(
         self, language: HomeModels.Languages
@@ -33,23 +198,11 @@ class JioSaavnApi:
         cookies = {"L": language.value}
 
         request_params = {"__call": "content.getHomepageData"}
-        resp = await self.client.get(
-            self.jio_api_base_url, cookies=cookies, params=request_params
-        )
-
-        resp = resp.json()
 
-        new_albums = [
-            HomeModels.NewAlbumItem(**album) for album in resp.get("new_albums")
-        ]
-        featured_playlists = [
-            HomeModels.FeaturedPlaylistItem(**featured_playlist)
-            for featured_playlist in resp.get("featured_playlists")
-        ]
-        charts = [HomeModels.ChartItem(**chart) for chart in resp.get("charts")]
-
-        return HomeModels.HomePageResponse(
-            new_albums=new_albums, featured_playlists=featured_playlists, charts=charts
+        return await self._api_call(
+            request_params,
+            HomeModels.HomePageResponse.model_validate,
+            cookies=cookies,
         )
 
     async def album_details(self, album_id: str) -> AlbumDetailsModel.AlbumDetails:
@@ -58,15 +211,13 @@ class JioSaavnApi:
             "__call": "content.getAlbumDetails",
             "albumid": album_id,
         }
-        resp = await self.client.get(self.jio_api_base_url, params=request_params)
-
-        resp = resp.json()
 
-        album_details = AlbumDetailsModel.AlbumDetail(**resp)
-        songs = [AlbumDetailsModel.Song(**song) for song in resp.get("songs")]
+        def _build(resp: dict) -> AlbumDetailsModel.AlbumDetails:
+            return AlbumDetailsModel.AlbumDetails.model_validate(
+                {"album_detail": resp, "songs": resp.get("songs")}
+            )
 
-        result = AlbumDetailsModel.AlbumDetails(album_detail=album_details, songs=songs)
-        return result
+        return await self._api_call(request_params, _build)
 
     async def artist_details(self, artist_id: str) -> ArtistDetailsModel.ArtistDetail:
         request_params = {
@@ -78,10 +229,10 @@ class JioSaavnApi:
             "sortOrder": "desc",
             "artistId": artist_id,
         }
-        resp = await self.client.get(self.jio_api_base_url, params=request_params)
 
-        resp: dict = resp.json()
-        return ArtistDetailsModel.ArtistDetail(**resp)
+        return await self._api_call(
+            request_params, ArtistDetailsModel.ArtistDetail.model_validate
+        )
 
     async def search(self, query: str, search_mode: SearchModel.SearchModes) -> Union[
         list[SearchModel.Song],
@@ -98,39 +249,89 @@ class JioSaavnApi:
             "ctx": "web6dot0",
             "q": query,
         }
-        resp = await self.client.get(self.jio_api_base_url, params=request_params)
 
-        resp: dict = resp.json()
+        adapter = SEARCH_RESULTS.get(search_mode)
+        if adapter is None:
+            return None
+
+        return await self._api_call(
+            request_params, lambda resp: adapter.validate_python(resp.get("results"))
+        )
+
+    async def song_details(self, song_id: str) -> SongDetailsModel.SongDetail:
+        return await self._api_call(
+            _song_params(song_id),
+            lambda resp: SongDetailsModel.SongDetail.model_validate(resp[song_id]),
+        )
+
+    async def songs_details(
+        self, song_ids: list[str]
+    ) -> list[SongDetailsModel.SongDetail]:
+        """
+        Fetches the details of many songs with batched ``song.getDetails``
+        calls.
 
-        if search_mode == SearchModel.SearchModes.SONGS:
-            return [SearchModel.Song(**song) for song in resp.get("results")]
+        Songs already cached by ``song_details`` are not fetched again; the
+        rest are requested ``SONG_BATCH_SIZE`` pids at a time, with at most
+        ``SONG_BATCH_CONCURRENCY`` batches in flight. Every fetched song is
+        stored under its ``song_details`` cache key and its stream URL is
+        decrypted, so playing it afterwards needs no upstream call.
 
-        elif search_mode == SearchModel.SearchModes.ALBUMS:
-            return [SearchModel.Album(**album) for album in resp.get("results")]
+        Args:
+            song_ids (list[str]): The song IDs.
 
-        elif search_mode == SearchModel.SearchModes.ARTISTS:
-            return [SearchModel.Artist(**artist) for artist in resp.get("results")]
+        Returns:
+            list[SongDetailsModel.SongDetail]: The songs found, in the order
+                of ``song_ids``.
+        """
+        song_ids = list(dict.fromkeys(song_ids))
+        ttl = API_CACHE_TTLS["song.getDetails"]
+        songs = {}
+        missing = []
+        for song_id in song_ids:
+            song = self.cache.get(_cache_key(_song_params(song_id)))
+            if song is None:
+                missing.append(song_id)
+            else:
+                songs[song_id] = song
 
-        elif search_mode == SearchModel.SearchModes.PLAYLISTS:
-            return [
-                SearchModel.Playlist(**playlist) for playlist in resp.get("results")
+        semaphore = asyncio.Semaphore(SONG_BATCH_CONCURRENCY)
+
+        async def _fetch_batch(batch: list[str]) -> None:
+            async with semaphore:
+                resp = await self.client.get(
+                    self.jio_api_base_url, params=_song_params(",".join(batch))
+                )
+            resp: dict = resp.json()
+            for song_id in batch:
+                if isinstance(resp.get(song_id), dict):
+                    song = SongDetailsModel.SongDetail.model_validate(resp[song_id])
+                    self.cache.set(_cache_key(_song_params(song_id)), song, ttl)
+                    songs[song_id] = song
+
+        await asyncio.gather(
+            *[
+                _fetch_batch(missing[i : i + SONG_BATCH_SIZE])
+                for i in range(0, len(missing), SONG_BATCH_SIZE)
             ]
+        )
 
-        return None
+        decrypt_urls([song.encrypted_media_url for song in songs.values()])
+        return [songs[song_id] for song_id in song_ids if song_id in songs]
 
-    async def song_details(self, song_id: str) -> SongDetailsModel.SongDetail:
-        request_params = {
-            "__call": "song.getDetails",
-            "cc": "in",
-            "pids": song_id,
-            "_format": "json",
-            "_marker": "0",
-        }
-        resp = await self.client.get(self.jio_api_base_url, params=request_params)
+    def prefetch_songs(self, song_ids: list[str]) -> None:
+        """
+        Warms the song details cache for ``song_ids`` in the background.
+        """
+        task = asyncio.create_task(self.songs_details(song_ids))
+        self._prefetches.add(task)
 
-        resp: dict = resp.json()
+        def _done(task):
+            self._prefetches.discard(task)
+            if not task.cancelled():
+                task.exception()
 
-        return SongDetailsModel.SongDetail(**resp[song_id])
+        task.add_done_callback(_done)
 
     async def playlist_details(
         self, playlist_id: str
@@ -142,8 +343,7 @@ class JioSaavnApi:
             "_format": "json",
             "_marker": "0",
         }
-        resp = await self.client.get(self.jio_api_base_url, params=request_params)
-
-        resp: dict = resp.json()
 
-        return PlaylistDetailsModel.PlaylistDetail(**resp)
+        return await self._api_call(
+            request_params, PlaylistDetailsModel.PlaylistDetail.model_validate
+        )
@@ -1,20 +1,47 @@
 from hashlib import sha1
 from time import time
+from datetime import datetime, timezone
 from random import randint
 
-import m3u8
 from socket import socket, AF_INET, SOCK_DGRAM
 import json
-from httpx import post, AsyncClient, Limits
-from os import path
-from base64 import b64encode
+from httpx import post, AsyncClient, Headers, Limits, Request
+from os import path, environ
+from base64 import b64encode, urlsafe_b64decode
 import asyncio
 
 from logging import Logger
 
+from Modules.AsyncCache import AsyncTTLCache
+from Modules.AtomicFile import atomic_write
+from Modules.ChannelCatalog import (
+    GENRES,
+    LANGUAGES,
+    ChannelCatalog,
+    dictionary_tables,
+)
+from Modules.ChannelList import loads, read_channel_list
+from Modules.EPG import EPGStore
+from Modules.M3U8Rewriter import (
+    AUDIO,
+    KEY,
+    MAP,
+    PLAYLIST,
+    SEGMENT,
+    SUBTITLES,
+    base_url_of,
+    resolve_uri,
+    rewrite_playlist,
+    tag_value,
+)
+from Modules.PlaylistRenderer import PlaylistRenderer
+from Modules.SegmentCache import SegmentCache
+from Modules.SegmentPrefetcher import SegmentPrefetcher
+from Modules.SnapshotCache import load_snapshot, revalidate_snapshot
+from Modules.StreamTokens import StreamTokenTable
+
 # Constants
 IMG_PUBLIC = "https://jioimages.cdn.jio.com/imagespublic/"
-IMG_CATCHUP = "https://jiotv.catchup.cdn.jio.com/dare_images/images/"
 IMG_CATCHUP_SHOWS = "https://jiotv.catchup.cdn.jio.com/dare_images/shows/"
 FEATURED_SRC = (
     "https://tv.media.jio.com/apis/v1.6/getdata/featurednew?start=0&limit=30&langId=6"
@@ -28,12 +55,95 @@ DICTIONARY_URL = "https://jiotvapi.cdn.jio.com/apis/v1.3/dictionary/dictionary?l
 REFRESH_TOKEN_URL = (
     "https://auth.media.jio.com/tokenservice/apis/v1/refreshtoken?langId=6"
 )
+
+SEGMENT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+SEGMENT_CACHE_TTL = 120
+# Size of the chunks segment bodies are read from upstream and sent in.
+SEGMENT_CHUNK_SIZE = int(environ.get("JIOTV_SEGMENT_CHUNK_SIZE", 256 * 1024))
+# Number of newest segments to prefetch per polled variant. Off by default, as
+# it fetches segments upstream that no client may end up requesting.
+PREFETCH_SEGMENTS = int(environ.get("JIOTV_PREFETCH_SEGMENTS", 0))
+PREFETCH_IDLE_TIMEOUT = float(environ.get("JIOTV_PREFETCH_IDLE_TIMEOUT", 30))
+# Seconds before the hdnea expiry at which cached playlists are dropped.
+HDNEA_EXPIRY_MARGIN = 60
+HEADER_CACHE_SIZE = 1024
+CATALOG_TTL = 3600
+# Minimum seconds between background revalidations after a failed one.
+CATALOG_RETRY_INTERVAL = 60
+CHANNELS_CACHE_FILE = path.join("data", "channels.cache")
+DICTIONARY_CACHE_FILE = path.join("data", "dictionary.cache")
+EPG_PAST_DAYS = 1
+EPG_FUTURE_DAYS = 1
+EPG_CONCURRENCY = 16
+# Longest wait of /epg.xml for the initial guide fill.
+EPG_READY_TIMEOUT = 10
+
+AUTH_HEADERS_FILE = path.join("data", "jio_headers.json")
+# Refresh this many seconds before the access token expires.
+REFRESH_MARGIN = 300
+# First retry after a failed refresh, doubled on every further failure.
+REFRESH_RETRY_INTERVAL = 60
+# Used when the token expiry is unknown, and the longest retry backoff.
+REFRESH_FALLBACK_INTERVAL = 45 * 60
+# Reactive refreshes within this window reuse the previous attempt's result.
+REFRESH_COOLDOWN = 30
 # ---------------------
 
 
 android_id = sha1(f"{time()}{randint(0, 99)}".encode()).hexdigest()[:16]
 
 
+def hdnea_ttl(cookie):
+    """
+    Returns how long a signed ``__hdnea__`` cookie remains usable.
+
+    Args:
+        cookie (str): The cookie, e.g. ``__hdnea__=st=...~exp=1700000000~acl=...``.
+
+    Returns:
+        float: Seconds until the token expires minus a safety margin, or 0 if
+            no expiry could be read.
+    """
+    for field in cookie.split("=", 1)[-1].split("~"):
+        if field.startswith("exp="):
+            try:
+                return max(int(field[4:]) - time() - HDNEA_EXPIRY_MARGIN, 0)
+            except ValueError:
+                return 0
+    return 0
+
+
+def jwt_expiry(token):
+    """
+    Reads the ``exp`` claim of a JWT without verifying it.
+
+    Args:
+        token (str): The JWT.
+
+    Returns:
+        float: The expiry as a Unix timestamp, or 0 if it cannot be read.
+    """
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return float(json.loads(urlsafe_b64decode(payload)).get("exp", 0))
+    except (IndexError, ValueError, AttributeError):
+        return 0
+
+
+def catchup_time(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y%m%dT%H%M%S")
+
+
+async def _read_dictionary(resp):
+    return dictionary_tables(loads(await resp.aread()))
+
+
+def write_auth_headers(auth_headers):
+    with atomic_write(AUTH_HEADERS_FILE) as f:
+        json.dump(auth_headers, f, indent=4)
+
+
 class JioTV:
     def __init__(self, logger: Logger) -> None:
         self.logger = logger
@@ -44,56 +154,74 @@ class JioTV:
             timeout=None
         )
 
-        self._cached_m3u8 = None
-        self._last_playlist_fetch = 0
-
-        if path.exists(path.join("data", "jio_headers.json")):
-            auth_headers = json.load(open(path.join("data", "jio_headers.json"), "r"))
-            self.request_headers = {
-                "appkey": "NzNiMDhlYcQyNjJm",
-                "channel_id": "144",
-                "channelid": "144",
-                "crmid": auth_headers["crmid"],
-                "deviceId": auth_headers["device_id"],
-                "devicetype": "phone",
-                "isott": "true",
-                "languageId": "6",
-                "lbcookie": "1",
-                "os": "android",
-                "osVersion": "14",
-                "srno": "240707144000",
-                "ssotoken": auth_headers["ssotoken"],
-                "subscriberId": auth_headers["subscriberid"],
-                "uniqueId": auth_headers["uniqueid"],
-                "appname": "RJIL_JioTV",
-                "User-Agent": "plaYtv/7.1.5 (Linux;Android 13) ExoPlayerLib/2.11.6",
-                "usergroup": "tvYR7NSNn7rymo3F",
-                "versionCode": "331",
-            }
-            self.channel_headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "appkey": "NzNiMDhlYzQyNjJm",
-                "userid": auth_headers["userid"],
-                "crmid": auth_headers["crmid"],
-                "deviceId": auth_headers["device_id"],
-                "devicetype": "phone",
-                "isott": "true",
-                "languageId": "6",
-                "lbcookie": "1",
-                "os": "android",
-                "dm": "Xiaomi 22101316UP",
-                "osversion": "14",
-                "srno": "240303144000",
-                "accesstoken": auth_headers["accesstoken"],
-                "subscriberid": auth_headers["subscriberid"],
-                "uniqueId": auth_headers["uniqueid"],
-                "usergroup": "tvYR7NSNn7rymo3F",
-                "User-Agent": "okhttp/4.9.3",
-                "versionCode": "331",
-            }
+        self.segment_cache = SegmentCache(
+            max_bytes=SEGMENT_CACHE_MAX_BYTES,
+            ttl=SEGMENT_CACHE_TTL,
+            chunk_size=SEGMENT_CHUNK_SIZE,
+        )
+        self._stream_headers = {}
+        self._key_headers = {}
+        self.stream_tokens = StreamTokenTable()
+        self.prefetcher = None
+        if PREFETCH_SEGMENTS > 0:
+            self.prefetcher = SegmentPrefetcher(
+                fetch_segment=self.get_cached_segment,
+                fetch_key=self.get_cached_key,
+                segments=PREFETCH_SEGMENTS,
+                idle_timeout=PREFETCH_IDLE_TIMEOUT,
+            )
+
+        self._playback_cache = AsyncTTLCache(maxsize=1024)
+        self._master_cache = AsyncTTLCache(maxsize=1024)
+        self._variant_cache = AsyncTTLCache(maxsize=1024)
+        self.catalog = None
+        self._channels_snapshot = None
+        self._dictionary_snapshot = None
+        self._catalog_task = None
+        self._last_catalog_attempt = 0
+
+        self.playlist_renderer = PlaylistRenderer(catchup_days=EPG_PAST_DAYS)
+        self.epg = EPGStore(
+            self.client,
+            headers=lambda: self.channel_headers,
+            send=self.send,
+            source=CATCHUP_SRC,
+            poster_base=IMG_CATCHUP_SHOWS,
+            logger=self.logger,
+            past_days=EPG_PAST_DAYS,
+            future_days=EPG_FUTURE_DAYS,
+            concurrency=EPG_CONCURRENCY,
+        )
+
+        self.auth_headers = None
+        self.token_expires_at = 0
+        self.on_token_refresh = None
+        self._refresh_task = None
+        self._last_refresh_attempt = 0
+        self._last_refresh_ok = False
+        self._refresh_failures = 0
+
+        if path.exists(AUTH_HEADERS_FILE):
+            with open(AUTH_HEADERS_FILE, "r") as auth_file:
+                self.update_headers(json.load(auth_file))
+
+    def update_headers(self, auth_headers=None):
+        """
+        Rebuilds the upstream request headers from the in-memory credentials.
 
-    def update_headers(self):
-        auth_headers = json.load(open(path.join("data", "jio_headers.json"), "r"))
+        Args:
+            auth_headers (dict, optional): New credentials to adopt. Defaults
+                to the ones already loaded.
+        """
+        if auth_headers is not None:
+            self.auth_headers = auth_headers
+        auth_headers = self.auth_headers
+        self.token_expires_at = jwt_expiry(auth_headers.get("accesstoken", ""))
+
+        self._playback_cache.invalidate()
+        self._master_cache.invalidate()
+        self._stream_headers.clear()
+        self._key_headers.clear()
 
         self.request_headers = {
             "appkey": "NzNiMDhlYcQyNjJm",
@@ -160,25 +288,16 @@ class JioTV:
 
     async def get_channels(self):
         """
-        Retrieves channels from the specified source and saves them to a JSON file.
+        Revalidates the channel list against upstream and returns it.
 
-        This function sends a GET request to the CHANNELS_SRC_NEW endpoint with the specified headers. It retrieves the JSON response and extracts the 'result' field. The extracted data is then saved to a JSON file located at 'data/channels.json'.
-
-        Parameters:
-        None
+        The list is persisted to ``CHANNELS_CACHE_FILE`` and the catalog is
+        rebuilt when it changed.
 
         Returns:
-        None
+            list[Channel]: The channels of the catalog.
         """
-
-        response = await self.client.get(CHANNELS_SRC_NEW, headers=self.channel_headers)
-        response = response.json()["result"]
-
-        def _write():
-            with open(r"data\channels.json", "w") as f:
-                json.dump(response, f, ensure_ascii=False, indent=4)
-
-        await asyncio.to_thread(_write)
+        await asyncio.shield(self.refresh_catalog())
+        return self.catalog.channels
 
     async def sendOTP(self, mobile):
 
@@ -279,20 +398,43 @@ class JioTV:
 
             headers.update(_CREDS)
 
-            def _write():
-                with open("data/jio_headers.json", "w") as f:
-                    json.dump(headers, f, indent=4)
-
-            await asyncio.to_thread(_write)
+            self.auth_headers = headers
+            self._last_refresh_attempt = time()
+            self._last_refresh_ok = True
+            self._refresh_failures = 0
+            await asyncio.to_thread(write_auth_headers, headers)
 
             return "[SUCCESS]"
         else:
             return "[FAILED]"
 
-    async def refresh_token(self):
-        if path.exists(path.join("data", "jio_headers.json")):
-            with open(path.join("data", "jio_headers.json"), "r") as auth_file:
-                auth_headers = json.load(auth_file)
+    async def refresh_token(self, reactive=False):
+        """
+        Refreshes the access token, sharing one upstream call between every
+        concurrent caller.
+
+        Args:
+            reactive (bool): True when triggered by an upstream 401/419. A
+                reactive call made shortly after another refresh attempt reuses
+                that attempt's outcome instead of hitting the token service
+                again, so failing streams cannot cause a refresh storm.
+
+        Returns:
+            bool: Whether valid, refreshed credentials are in place.
+        """
+        if self.auth_headers is None:
+            return False
+
+        if self._refresh_task is None:
+            if reactive and time() - self._last_refresh_attempt < REFRESH_COOLDOWN:
+                return self._last_refresh_ok
+            self._refresh_task = asyncio.create_task(self._refresh_token())
+
+        return await asyncio.shield(self._refresh_task)
+
+    async def _refresh_token(self):
+        try:
+            auth_headers = dict(self.auth_headers)
 
             post_body = {
                 "appName": "RJIL_JioTV",
@@ -325,17 +467,121 @@ class JioTV:
                 if resp.get("refreshToken"):
                     auth_headers["refresh_token"] = resp.get("refreshToken")
 
-                def _write():
-                    with open(path.join("data", "jio_headers.json"), "w") as f:
-                        json.dump(auth_headers, f, indent=4)
-
-                await asyncio.to_thread(_write)
+                self.update_headers(auth_headers)
+                await asyncio.to_thread(write_auth_headers, auth_headers)
 
-                return True
+                self._last_refresh_ok = True
+                if self.on_token_refresh is not None:
+                    await self.on_token_refresh()
             else:
-                return False
-        else:
-            return False
+                self._last_refresh_ok = False
+        except Exception as e:
+            self.logger.warning(f"[!] Token refresh failed: {e}")
+            self._last_refresh_ok = False
+        finally:
+            self._last_refresh_attempt = time()
+            self._refresh_task = None
+            if self._last_refresh_ok:
+                self._refresh_failures = 0
+            else:
+                self._refresh_failures += 1
+
+        return self._last_refresh_ok
+
+    def seconds_until_refresh(self):
+        """
+        Returns how long to wait before the next scheduled token refresh.
+
+        Returns:
+            float: Seconds until shortly before the access token expires, or
+                ``REFRESH_FALLBACK_INTERVAL`` if the expiry is unknown. After
+                failed refreshes the wait starts at ``REFRESH_RETRY_INTERVAL``
+                and doubles per consecutive failure, up to
+                ``REFRESH_FALLBACK_INTERVAL``.
+        """
+        if self._refresh_failures:
+            return min(
+                REFRESH_RETRY_INTERVAL * 2 ** (self._refresh_failures - 1),
+                REFRESH_FALLBACK_INTERVAL,
+            )
+        if not self.token_expires_at:
+            return REFRESH_FALLBACK_INTERVAL
+        return max(
+            self.token_expires_at - REFRESH_MARGIN - time(), REFRESH_RETRY_INTERVAL
+        )
+
+    async def send(self, build_request, stream=False):
+        """
+        Sends an upstream request, refreshing the token and retrying once if
+        upstream rejects it with 401 or 419.
+
+        Args:
+            build_request (Callable): Returns a fresh ``httpx.Request``; called
+                again for the retry so it picks up the refreshed headers.
+            stream (bool): Whether to stream the response body.
+
+        Returns:
+            Response: The upstream response.
+        """
+        resp = await self.client.send(build_request(), stream=stream)
+        if resp.status_code in (401, 419) and await self.refresh_token(reactive=True):
+            await resp.aclose()
+            resp = await self.client.send(build_request(), stream=stream)
+        return resp
+
+    def _build_headers(self, cid, cookie, content_type=None):
+        headers = Headers(self.client.headers)
+        headers.update(self.request_headers)
+        headers["channelid"] = str(cid)
+        headers["srno"] = "240707144000"
+        headers["cookie"] = cookie
+        if content_type is not None:
+            headers["Content-type"] = content_type
+        return headers
+
+    def stream_headers(self, cid, cookie):
+        """
+        Returns the prebuilt upstream headers for playlists and segments of a
+        channel.
+
+        Header sets are built once per (channel ID, cookie) and reused by every
+        request until ``update_headers`` runs; callers must not mutate them.
+
+        Args:
+            cid (int): The channel ID.
+            cookie (str): The cookie value.
+
+        Returns:
+            Headers: The complete header set, including the client defaults.
+        """
+        key = (str(cid), cookie)
+        headers = self._stream_headers.get(key)
+        if headers is None:
+            if len(self._stream_headers) >= HEADER_CACHE_SIZE:
+                self._stream_headers.clear()
+            headers = self._stream_headers[key] = self._build_headers(cid, cookie)
+        return headers
+
+    def key_headers(self, cid, cookie):
+        """
+        Returns the prebuilt upstream headers for AES key requests of a channel.
+
+        Args:
+            cid (int): The channel ID.
+            cookie (str): The cookie value.
+
+        Returns:
+            Headers: The complete header set, including the client defaults.
+        """
+        key = (str(cid), cookie)
+        headers = self._key_headers.get(key)
+        if headers is None:
+            if len(self._key_headers) >= HEADER_CACHE_SIZE:
+                self._key_headers.clear()
+            headers = self._key_headers[key] = self._build_headers(
+                cid, cookie, content_type="application/octet-stream"
+            )
+        return headers
 
     async def get_key(self, uri, cid, cookie):
         """
@@ -349,15 +595,8 @@ class JioTV:
         Returns:
             bytes: The retrieved key as bytes.
         """
-        headers = self.request_headers.copy()
-        headers["channelid"] = str(cid)
-        headers["srno"] = "240707144000"
-        headers["cookie"] = cookie
-        headers["Content-type"] = "application/octet-stream"
-
-        resp = await self.client.get(
-            uri,
-            headers=headers,
+        resp = await self.send(
+            lambda: Request("GET", uri, headers=self.key_headers(cid, cookie))
         )
         resp = resp.content
 
@@ -375,17 +614,78 @@ class JioTV:
         Returns:
             bytes: The response content.
         """
-        headers = self.request_headers.copy()
-        headers["channelid"] = str(cid)
-        headers["srno"] = "240707144000"
-        headers["cookie"] = cookie
-
-        resp = await self.client.get(
-            uri,
-            headers=headers,
+        resp = await self.send(
+            lambda: Request("GET", uri, headers=self.stream_headers(cid, cookie))
         )
         return resp.content
 
+    def _open_stream(self, uri, headers, method="GET", range_header=None):
+        def _build():
+            request = Request(method, uri, headers=headers())
+            if range_header:
+                request.headers["Range"] = range_header
+            return request
+
+        return self.send(_build, stream=True)
+
+    def open_segment(self, uri, cid, cookie, method="GET", range_header=None):
+        """
+        Opens a streamed upstream request for a segment, bypassing the cache.
+
+        Args:
+            uri (str): The URI of the segment.
+            cid (int): The channel ID.
+            cookie (str): The cookie value.
+            method (str): ``GET`` or ``HEAD``.
+            range_header (str, optional): A ``Range`` header to forward.
+
+        Returns:
+            Awaitable[httpx.Response]: The streamed response.
+        """
+        return self._open_stream(
+            uri, lambda: self.stream_headers(cid, cookie), method, range_header
+        )
+
+    def open_key(self, uri, cid, cookie, method="GET", range_header=None):
+        """
+        Opens a streamed upstream request for an AES key, bypassing the cache.
+        Takes the same arguments as ``open_segment``.
+        """
+        return self._open_stream(
+            uri, lambda: self.key_headers(cid, cookie), method, range_header
+        )
+
+    def get_cached_segment(self, uri, cid, cookie):
+        """
+        Returns the shared cache entry for a segment, fetching it upstream once
+        no matter how many clients request it concurrently.
+
+        Args:
+            uri (str): The URI of the segment.
+            cid (int): The channel ID.
+            cookie (str): The cookie value.
+
+        Returns:
+            CachedSegment: The cached or in-flight segment.
+        """
+        return self.segment_cache.fetch(
+            uri, lambda: self.open_segment(uri, cid, cookie)
+        )
+
+    def get_cached_key(self, uri, cid, cookie):
+        """
+        Returns the shared cache entry for an AES key.
+
+        Args:
+            uri (str): The URI of the key.
+            cid (int): The channel ID.
+            cookie (str): The cookie value.
+
+        Returns:
+            CachedSegment: The cached or in-flight key.
+        """
+        return self.segment_cache.fetch(uri, lambda: self.open_key(uri, cid, cookie))
+
     async def get_audio(self, uri, cid, cookie):
         """
         Generate the audio m3u8 playlist with modified URLs.
@@ -398,26 +698,10 @@ class JioTV:
         Returns:
             str: The modified audio m3u8 playlist.
         """
-        base_url = uri.split("/")
-        base_url.pop()
-        base_url = "/".join(base_url)
-
         audio_m3u8 = await self.get_ts(uri, cid, cookie)
-        audio_m3u8 = audio_m3u8.decode()
-
-        parsed_audio_m3u8 = m3u8.loads(audio_m3u8)
-
-        for segment in parsed_audio_m3u8.segments:
-            audio_m3u8 = audio_m3u8.replace(
-                segment.uri,
-                f"/jiotv/get_ts?uri={base_url}/{segment.uri}&cid={cid}&cookie={cookie}",
-            )
-
-        for key in parsed_audio_m3u8.keys:
-            if key is not None:
-                audio_m3u8 = audio_m3u8.replace(
-                    key.uri, f"/jiotv/get_key?uri={key.uri}&cid={cid}&cookie={cookie}"
-                )
+        audio_m3u8, _, _ = self._rewrite_media_playlist(
+            audio_m3u8.decode(), base_url_of(uri), cid, cookie
+        )
 
         return audio_m3u8
 
@@ -438,55 +722,126 @@ class JioTV:
         Returns:
             str: Gets subtitles URI.
         """
-        base_url = uri.split("/")
-        base_url.pop()
-        base_url = "/".join(base_url)
+        base_url = base_url_of(uri)
+
+        def _rewrite(kind, segment_uri):
+            if kind == SEGMENT:
+                segment_uri = resolve_uri(
+                    base_url, segment_uri.replace(".webvtt", ".vtt")
+                )
+                return f"/jiotv/get_vtt?uri={segment_uri}&cid={cid}&cookie={cookie}"
 
         resp = await self.get_ts(uri, cid, cookie)
-        resp = resp.decode()
-        parsed_subs = m3u8.loads(resp)
+        return rewrite_playlist(resp.decode(), _rewrite)
 
-        for segment in parsed_subs.segments:
-            resp = resp.replace(
-                segment.uri,
-                f"/jiotv/get_vtt?uri={base_url}/{segment.uri.replace('.webvtt','.vtt')}&cid={cid}&cookie={cookie}",
-            )
+    def _token_path(self, uri, cid, cookie):
+        """
+        Splits an absolute upstream URI into a stream token and the file name
+        relative to the tokenized directory.
 
-        return resp
+        Args:
+            uri (str): The absolute upstream URI.
+            cid (str): The channel ID.
+            cookie (str): The cookie value.
 
-    async def get_channel_url(self, channel_id):
+        Returns:
+            str: ``<token>/<name>``, where name keeps any query string.
         """
-        Retrieves the URL of a channel based on its ID.
+        uri_path, _, query = uri.partition("?")
+        directory, _, name = uri_path.rpartition("/")
+        if query:
+            name = f"{name}?{query}"
+        return f"{self.stream_tokens.register(directory, cid, cookie)}/{name}"
+
+    def _rewrite_media_playlist(self, text, base_url, cid, cookie):
+        """
+        Points the segments, init sections and keys of a media playlist at the
+        proxy, using short ``/jiotv/s/`` and ``/jiotv/k/`` token paths.
+
+        Args:
+            text (str): The upstream media playlist.
+            base_url (str): The directory the playlist was served from.
+            cid (str): The channel ID.
+            cookie (str): The cookie value.
+
+        Returns:
+            tuple[str, list[str], list[str]]: The rewritten playlist and the
+                absolute segment and key URIs it references.
+        """
+        segment_uris = []
+        key_uris = []
+
+        def _rewrite(kind, uri):
+            uri = resolve_uri(base_url, uri)
+            if kind == SEGMENT:
+                segment_uris.append(uri)
+                return f"/jiotv/s/{self._token_path(uri, cid, cookie)}"
+            elif kind == MAP:
+                return f"/jiotv/s/{self._token_path(uri, cid, cookie)}"
+            elif kind == KEY:
+                if uri not in key_uris:
+                    key_uris.append(uri)
+                return f"/jiotv/k/{self._token_path(uri, cid, cookie)}"
+
+        return rewrite_playlist(text, _rewrite), segment_uris, key_uris
+
+    async def get_playback(self, channel_id):
+        """
+        Retrieves the playback URL and signed cookie of a channel.
+
+        The response is cached per channel until the expiry encoded in its
+        ``__hdnea__`` token.
 
         Args:
             channel_id (int): The ID of the channel.
 
         Returns:
-            str: The URL of the channel with various query parameters appended.
+            tuple[str, str]: The master playlist URL and the ``__hdnea__`` cookie.
+        """
 
-        Raises:
-            None: Does not raise any exceptions.
+        async def _fetch():
+            rjson = {"channel_id": int(channel_id), "stream_type": "Seek"}
+            resp = await self.send(
+                lambda: self.client.build_request(
+                    "POST",
+                    GET_CHANNEL_URL,
+                    headers=self.channel_headers,
+                    data=rjson,
+                )
+            )
+
+            resp = resp.json()
+            print("[+] Channel URL response received.")
+            print(resp)
+            print("[-] Channel URL response end")
+            onlyUrl = resp.get("bitrates", "").get("high", "")
+            print(f"[+] Only URL: {onlyUrl}")
+
+            cookie = "__hdnea__" + resp.get("result", "").split("__hdnea__")[-1]
+            return (onlyUrl, cookie), hdnea_ttl(cookie)
+
+        return await self._playback_cache.get_or_set(str(channel_id), _fetch)
+
+    async def _get_master(self, onlyUrl, channel_id, cookie):
         """
-        rjson = {"channel_id": int(channel_id), "stream_type": "Seek"}
-        resp = await self.client.post(
-            GET_CHANNEL_URL,
-            headers=self.channel_headers,
-            data=rjson,
-        )
+        Fetches a master playlist and points its variants, audio and subtitle
+        renditions at the proxy.
 
-        resp = resp.json()
-        print("[+] Channel URL response received.")
-        print(resp)
-        print("[-] Channel URL response end")
-        onlyUrl = resp.get("bitrates", "").get("high", "")
-        print(f"[+] Only URL: {onlyUrl}")
-
-        base_url = onlyUrl.split("?")[0].split("/")
-        base_url.pop()
-        base_url = "/".join(base_url)
-
-        cookie = "__hdnea__" + resp.get("result", "").split("__hdnea__")[-1]
-        first_m3u8 = await self.client.get(onlyUrl, headers=self.channel_headers)
+        Args:
+            onlyUrl (str): The upstream master playlist URL.
+            channel_id (int): The ID of the channel.
+            cookie (str): The ``__hdnea__`` cookie for the stream.
+
+        Returns:
+            str: The rewritten master playlist.
+        """
+        base_url = base_url_of(onlyUrl)
+
+        first_m3u8 = await self.send(
+            lambda: self.client.build_request(
+                "GET", onlyUrl, headers=self.channel_headers
+            )
+        )
         print("[*] Channel headers")
         print(self.channel_headers)
         print("[-] Channel headers end")
@@ -495,34 +850,97 @@ class JioTV:
         print(first_m3u8)
         print("[+] First m3u8 fetched.")
 
-        firast_m3u8_parsed = m3u8.loads(first_m3u8)
+        routes = {
+            PLAYLIST: "/jiotv/play",
+            SUBTITLES: "/jiotv/get_subs",
+            AUDIO: "/jiotv/get_audio",
+        }
+
+        def _rewrite(kind, uri):
+            route = routes.get(kind)
+            if route is not None:
+                uri = resolve_uri(base_url, uri)
+                return f"{route}?uri={uri}&cid={channel_id}&cookie={cookie}"
 
-        final_ = first_m3u8
-        for playlist in firast_m3u8_parsed.playlists:
-            final_ = final_.replace(
-                playlist.uri,
-                f"/jiotv/play?uri={base_url}/{playlist.uri}&cid={channel_id}&cookie={cookie}",
-            )
+        return rewrite_playlist(first_m3u8, _rewrite)
 
-        for media in firast_m3u8_parsed.media:
-            if media.type == "SUBTITLES":
-                final_ = final_.replace(
-                    media.uri,
-                    f"/jiotv/get_subs?uri={base_url}/{media.uri}&cid={channel_id}&cookie={cookie}",
-                )
+    async def get_channel_url(self, channel_id):
+        """
+        Retrieves the URL of a channel based on its ID.
+
+        The rewritten master playlist is cached per channel for as long as its
+        signed cookie stays valid.
+
+        Args:
+            channel_id (int): The ID of the channel.
+
+        Returns:
+            str: The URL of the channel with various query parameters appended.
+
+        Raises:
+            None: Does not raise any exceptions.
+        """
 
-        for media in firast_m3u8_parsed.media:
-            if media.type == "AUDIO" and media.uri is not None:
-                final_ = final_.replace(
-                    media.uri,
-                    f"/jiotv/get_audio?uri={base_url}/{media.uri}&cid={channel_id}&cookie={cookie}",
+        async def _fetch():
+            onlyUrl, cookie = await self.get_playback(channel_id)
+            final_ = await self._get_master(onlyUrl, channel_id, cookie)
+            return final_, hdnea_ttl(cookie)
+
+        return await self._master_cache.get_or_set(str(channel_id), _fetch)
+
+    async def get_catchup_url(self, channel_id, start):
+        """
+        Retrieves the master playlist of a past programme.
+
+        Args:
+            channel_id (int): The ID of the channel.
+            start (int): Any Unix timestamp within the programme, normally its
+                start time.
+
+        Returns:
+            Optional[str]: The rewritten master playlist, or None if no
+                programme in the guide covers ``start``.
+        """
+        programme = await self.epg.programme_at(channel_id, int(start) + 1)
+        if programme is None:
+            return None
+
+        async def _fetch():
+            rjson = {
+                "channel_id": int(channel_id),
+                "stream_type": "Catchup",
+                "programId": programme.srno,
+                "showtime": "000000",
+                "srno": programme.srno,
+                "begin": catchup_time(programme.start),
+                "end": catchup_time(programme.stop),
+            }
+            resp = await self.send(
+                lambda: self.client.build_request(
+                    "POST",
+                    GET_CHANNEL_URL,
+                    headers=self.channel_headers,
+                    data=rjson,
                 )
-        return final_
+            )
+            resp = resp.json()
+            onlyUrl = resp.get("bitrates", {}).get("high", "")
+            cookie = "__hdnea__" + resp.get("result", "").split("__hdnea__")[-1]
+
+            final_ = await self._get_master(onlyUrl, channel_id, cookie)
+            return final_, hdnea_ttl(cookie)
+
+        return await self._master_cache.get_or_set(
+            ("catchup", str(channel_id), programme.srno), _fetch
+        )
 
     async def final_play(self, uri, cid, cookie):
         """
         Fetches and processes a playlist file from the given URI.
 
+        The rewritten playlist is cached for half of its target duration, so
+        every player on a channel shares one upstream fetch per refresh.
+
         Args:
             uri (str): The URI of the playlist file.
             cid (str): The channel ID.
@@ -534,99 +952,171 @@ class JioTV:
         Raises:
             None
         """
-        headers = self.request_headers.copy()
-        headers["channelid"] = str(cid)
-        headers["srno"] = "240707144000"
-        headers["cookie"] = cookie
 
-        resp = await self.client.get(
-            uri,
-            headers=headers,
+        async def _fetch():
+            resp = await self.send(
+                lambda: Request("GET", uri, headers=self.stream_headers(cid, cookie))
+            )
+            resp = resp.text
+
+            temp_text, segment_uris, key_uris = self._rewrite_media_playlist(
+                resp, base_url_of(uri), cid, cookie
+            )
+
+            if "#EXT-X-ENDLIST" in resp:
+                # Catchup playlists are complete and never change.
+                return (temp_text, [], []), hdnea_ttl(cookie)
+
+            ttl = float(tag_value(resp, "#EXT-X-TARGETDURATION") or 0) / 2
+            return (temp_text, segment_uris, key_uris), ttl
+
+        temp_text, segment_uris, key_uris = await self._variant_cache.get_or_set(
+            (uri, str(cid), cookie), _fetch
         )
-        resp = resp.text
 
-        parsed_m3u8 = m3u8.loads(resp)
+        if self.prefetcher is not None and segment_uris:
+            self.prefetcher.notify(uri, cid, cookie, segment_uris, key_uris)
 
-        base_url = uri.split("/")
-        base_url.pop()
-        base_url = "/".join(base_url)
+        return temp_text
 
-        temp_text = resp
+    def refresh_catalog(self, from_disk=False):
+        """
+        Starts revalidating the channel list, unless a refresh is already
+        running.
 
-        for segment in parsed_m3u8.segments:
-            temp_text = temp_text.replace(
-                segment.uri,
-                f"/jiotv/get_ts?uri={base_url}/{segment.uri}&cid={cid}&cookie={cookie}",
+        Args:
+            from_disk (bool): Use the on-disk snapshot as is, if there is one,
+                instead of revalidating it.
+
+        Returns:
+            asyncio.Task: The running refresh.
+        """
+        if self._catalog_task is None or self._catalog_task.done():
+            self._last_catalog_attempt = time()
+            self._catalog_task = asyncio.create_task(self._refresh_catalog(from_disk))
+            self._catalog_task.add_done_callback(self._log_catalog_failure)
+        return self._catalog_task
+
+    def _log_catalog_failure(self, task):
+        if not task.cancelled() and task.exception() is not None:
+            self.logger.warning(f"[!] Channel list refresh failed: {task.exception()}")
+
+    async def _refresh_catalog(self, from_disk):
+        if from_disk and self.catalog is not None:
+            return
+
+        snapshot = self._channels_snapshot
+        if snapshot is None:
+            snapshot = await asyncio.to_thread(load_snapshot, CHANNELS_CACHE_FILE)
+
+        if not (from_disk and snapshot is not None):
+            revalidated = await revalidate_snapshot(
+                self.client,
+                CHANNELS_SRC_NEW,
+                lambda: self.channel_headers,
+                CHANNELS_CACHE_FILE,
+                parse=read_channel_list,
+                snapshot=snapshot,
+                send=self.send,
             )
+            unchanged = revalidated is snapshot
+            snapshot = revalidated
+            if unchanged and self.catalog is not None:
+                self._channels_snapshot = snapshot
+                return
+            genres, languages = await self._load_dictionary(revalidate=True)
+        else:
+            genres, languages = await self._load_dictionary(revalidate=False)
 
-        for key in parsed_m3u8.keys:
-            if key is not None:
-                temp_text = temp_text.replace(
-                    key.uri, f"/jiotv/get_key?uri={key.uri}&cid={cid}&cookie={cookie}"
+        self.catalog = ChannelCatalog(snapshot.data, genres, languages)
+        # The catalog holds every channel; keep only the validators so the
+        # records are not held twice. They stay on disk for revalidation.
+        snapshot.data = None
+        self._channels_snapshot = snapshot
+
+    async def _load_dictionary(self, revalidate):
+        """
+        Returns the genre and language tables, read from the on-disk snapshot
+        and only fetched from ``DICTIONARY_URL`` when there is none or
+        ``revalidate`` is set. Falls back to the built-in tables if the
+        dictionary cannot be fetched.
+        """
+        snapshot = self._dictionary_snapshot
+        if snapshot is None:
+            snapshot = await asyncio.to_thread(load_snapshot, DICTIONARY_CACHE_FILE)
+
+        if snapshot is None or revalidate:
+            try:
+                snapshot = await revalidate_snapshot(
+                    self.client,
+                    DICTIONARY_URL,
+                    lambda: self.channel_headers,
+                    DICTIONARY_CACHE_FILE,
+                    parse=_read_dictionary,
+                    snapshot=snapshot,
+                    send=self.send,
                 )
+            except Exception as e:
+                self.logger.warning(f"[!] Dictionary fetch failed: {e}")
+                if snapshot is None:
+                    return GENRES, LANGUAGES
 
-        return temp_text
+        self._dictionary_snapshot = snapshot
+        return snapshot.data
+
+    async def get_catalog(self):
+        """
+        Returns the indexed channel catalog.
+
+        The first call loads the channel list from the on-disk snapshot, only
+        waiting on upstream when there is none; once the list is older than
+        ``CATALOG_TTL`` it is revalidated in the background while the current
+        catalog keeps being served.
+
+        Returns:
+            ChannelCatalog: The current channel catalog.
+        """
+        if self.catalog is None:
+            await asyncio.shield(self.refresh_catalog(from_disk=True))
 
-    async def get_playlists(self, host):
         if (
-            self._cached_m3u8 is not None
-            and (time() - self._last_playlist_fetch) < 3600
+            self._channels_snapshot.age > CATALOG_TTL
+            and time() - self._last_catalog_attempt > CATALOG_RETRY_INTERVAL
         ):
-            return self._cached_m3u8
-
-        response = await self.client.get(CHANNELS_SRC_NEW, headers=self.channel_headers)
-        response = response.json()
-
-        channels = response["result"]
-
-        lang_id = {
-            6: "English",
-            1: "Hindi",
-            2: "Marathi",
-            3: "Punjabi",
-            4: "Urdu",
-            5: "Bengali",
-            7: "Malayalam",
-            8: "Tamil",
-            9: "Gujarati",
-            10: "Odia",
-            11: "Telugu",
-            12: "Bhojpuri",
-            13: "Kannada",
-            14: "Assamese",
-            15: "Nepali",
-            16: "French",
-        }
+            self.refresh_catalog()
+        return self.catalog
 
-        genre_id = {
-            8: "Sports",
-            5: "Entertainment",
-            6: "Movies",
-            12: "News",
-            13: "Music",
-            7: "Kids",
-            9: "Lifestyle",
-            10: "Infotainment",
-            15: "Devotional",
-            0x10: "Business",
-            17: "Educational",
-            18: "Shopping",
-            19: "JioDarshan",
-        }
+    async def get_epg(self, compress=False):
+        """
+        Streams the programme guide of all channels as XMLTV.
 
-        m3u8_text = """#EXTM3U\n"""
+        The guide is loaded and refreshed in the background. Until the first
+        fill completes, the request waits up to ``EPG_READY_TIMEOUT`` seconds
+        and then streams the guide days loaded so far.
 
-        for channel in channels:
-            channel_id = channel["channel_id"]
-            channel_logo = (
-                "http://jiotv.catchup.cdn.jio.com/dare_images/images/"
-                + channel["logoUrl"]
-            )
-            channel_name = channel["channel_name"]
-            channel_genre = genre_id.get(channel["channelCategoryId"], "Unknown")
-            m3u8_text += f'#EXTINF:-1 tvg-id="{channel_id}" group-title="{channel_genre}" tvg-logo="{channel_logo}",{channel_name}\nhttp://{host}/jiotv/m3u8?cid={channel_id}\n'
-
-        m3u8_text = m3u8_text.strip()
-        self._cached_m3u8 = m3u8_text
-        self._last_playlist_fetch = time()
-        return m3u8_text
+        Args:
+            compress (bool): Whether to gzip the stream.
+
+        Returns:
+            AsyncIterator[bytes]: The XMLTV document.
+        """
+        await self.epg.ensure_loaded(self.get_catalog, timeout=EPG_READY_TIMEOUT)
+        catalog = await self.get_catalog()
+        return self.epg.iter_xmltv(catalog, compress=compress)
+
+    async def get_playlists(self, host, genre=None, language=None):
+        """
+        Returns the M3U playlist of all channels for the given host.
+
+        Args:
+            host (str): The host clients reach the proxy on.
+            genre (str, optional): Only include channels of this genre.
+            language (str, optional): Only include channels in this language.
+
+        Returns:
+            RenderedBody: The pre-encoded and pre-compressed playlist.
+        """
+        catalog = await self.get_catalog()
+        return self.playlist_renderer.render(
+            catalog, host, genre=genre, language=language
+        )
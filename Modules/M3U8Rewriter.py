@@ -0,0 +1,125 @@
+from typing import Callable, Optional
+
+import re
+
+# Kinds of URI passed to the rewrite callback.
+SEGMENT = "SEGMENT"
+PLAYLIST = "PLAYLIST"
+IFRAME_PLAYLIST = "IFRAME_PLAYLIST"
+KEY = "KEY"
+MAP = "MAP"
+AUDIO = "AUDIO"
+VIDEO = "VIDEO"
+SUBTITLES = "SUBTITLES"
+CLOSED_CAPTIONS = "CLOSED-CAPTIONS"
+
+URI_ATTRIBUTE = re.compile(r'URI="([^"]*)"')
+TYPE_ATTRIBUTE = re.compile(r"TYPE=([A-Z-]+)")
+
+URI_TAGS = {
+    "#EXT-X-KEY": KEY,
+    "#EXT-X-SESSION-KEY": KEY,
+    "#EXT-X-MAP": MAP,
+    "#EXT-X-I-FRAME-STREAM-INF": IFRAME_PLAYLIST,
+}
+
+
+def base_url_of(uri: str) -> str:
+    """
+    Returns the directory part of a playlist URI, without its query string.
+    """
+    return uri.split("?")[0].rsplit("/", 1)[0]
+
+
+def resolve_uri(base_url: str, uri: str) -> str:
+    """
+    Resolves a playlist URI against the directory it was served from.
+
+    Args:
+        base_url (str): The directory of the playlist, without a trailing slash.
+        uri (str): The URI as written in the playlist.
+
+    Returns:
+        str: ``uri`` unchanged if it is absolute, otherwise joined to ``base_url``.
+    """
+    if uri.startswith(("http://", "https://")):
+        return uri
+    return f"{base_url}/{uri}"
+
+
+def tag_value(text: str, tag: str) -> Optional[str]:
+    """
+    Returns the value of the first occurrence of a single-valued tag.
+
+    Args:
+        text (str): The playlist text.
+        tag (str): The tag name, e.g. ``#EXT-X-TARGETDURATION``.
+
+    Returns:
+        Optional[str]: The value after the colon, or None if the tag is absent.
+    """
+    start = text.find(tag + ":")
+    if start == -1:
+        return None
+    start += len(tag) + 1
+    end = text.find("\n", start)
+    return (text[start:] if end == -1 else text[start:end]).strip()
+
+
+def rewrite_playlist(
+    text: str, rewrite: Callable[[str, str], Optional[str]]
+) -> str:
+    """
+    Rewrites every URI in an m3u8 playlist in a single pass over its lines.
+
+    Plain URI lines are passed as ``SEGMENT``, or ``PLAYLIST`` when they follow
+    an ``#EXT-X-STREAM-INF`` tag. ``URI="..."`` attributes of ``#EXT-X-KEY``,
+    ``#EXT-X-MAP``, ``#EXT-X-I-FRAME-STREAM-INF`` and ``#EXT-X-MEDIA`` tags are
+    passed with their tag's kind, using the ``TYPE`` attribute for media.
+
+    Args:
+        text (str): The playlist text.
+        rewrite (Callable): Called with ``(kind, uri)``; returns the new URI,
+            or None to keep the original.
+
+    Returns:
+        str: The rewritten playlist.
+    """
+    out = []
+    uri_kind = SEGMENT
+
+    for line in text.splitlines():
+        if not line or line.isspace():
+            out.append(line)
+            continue
+
+        if line[0] != "#":
+            new_uri = rewrite(uri_kind, line.strip())
+            out.append(line if new_uri is None else new_uri)
+            uri_kind = SEGMENT
+            continue
+
+        tag = line.split(":", 1)[0]
+        if tag == "#EXT-X-STREAM-INF":
+            uri_kind = PLAYLIST
+        elif 'URI="' in line:
+            if tag == "#EXT-X-MEDIA":
+                media_type = TYPE_ATTRIBUTE.search(line)
+                kind = media_type.group(1) if media_type else None
+            else:
+                kind = URI_TAGS.get(tag)
+
+            if kind is not None:
+
+                def _sub(match, kind=kind):
+                    new_uri = rewrite(kind, match.group(1))
+                    return match.group(0) if new_uri is None else f'URI="{new_uri}"'
+
+                line = URI_ATTRIBUTE.sub(_sub, line)
+
+        out.append(line)
+
+    result = "\n".join(out)
+    if text.endswith("\n"):
+        result += "\n"
+    return result
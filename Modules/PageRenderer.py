@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import Optional
+
+import asyncio
+
+from jinja2 import Template
+
+from Modules.ChannelCatalog import ChannelCatalog
+from Modules.PlaylistRenderer import RenderedBody
+
+# Pages listing at least this many channels are rendered in a worker thread.
+THREAD_RENDER_THRESHOLD = 200
+
+
+class ChannelPageRenderer:
+    """
+    Renders the channel grid page once per catalog version and host,
+    keeping the encoded and compressed bodies.
+
+    Search results are rendered per request from the indexed catalog. Large
+    renders, and the compression of the full grid, run in a worker thread so
+    they never hold up the event loop.
+    """
+
+    def __init__(self, template: Template, maxsize: int = 8) -> None:
+        self.template = template
+        self.maxsize = maxsize
+        self._version = None
+        self._rendered: OrderedDict[str, RenderedBody] = OrderedDict()
+        self._pending: dict[str, asyncio.Task] = {}
+
+    def _render(self, channels, host: str, query: Optional[str] = None) -> str:
+        return self.template.render(
+            channels=channels,
+            search=query is not None,
+            query=query,
+            host=host,
+        )
+
+    def _render_body(self, channels, host: str) -> RenderedBody:
+        return RenderedBody(
+            self._render(channels, host).encode("utf-8"),
+            media_type="text/html; charset=utf-8",
+        )
+
+    async def render(self, catalog: ChannelCatalog, host: str) -> RenderedBody:
+        """
+        Returns the unfiltered page for ``host``, rendering it only on first
+        use. Concurrent first requests share one render.
+
+        Args:
+            catalog (ChannelCatalog): The channel catalog.
+            host (str): The host clients reach the proxy on.
+
+        Returns:
+            RenderedBody: The rendered page.
+        """
+        if catalog.version != self._version:
+            self._rendered.clear()
+            self._pending.clear()
+            self._version = catalog.version
+
+        rendered = self._rendered.get(host)
+        if rendered is not None:
+            self._rendered.move_to_end(host)
+            return rendered
+
+        task = self._pending.get(host)
+        if task is None:
+            task = asyncio.create_task(
+                asyncio.to_thread(self._render_body, catalog.channels, host)
+            )
+            self._pending[host] = task
+        try:
+            rendered = await asyncio.shield(task)
+        finally:
+            if task.done() and self._pending.get(host) is task:
+                del self._pending[host]
+
+        if catalog.version == self._version:
+            self._rendered[host] = rendered
+            while len(self._rendered) > self.maxsize:
+                self._rendered.popitem(last=False)
+        return rendered
+
+    async def search(self, catalog: ChannelCatalog, host: str, query: str) -> str:
+        """
+        Renders the page for the channels whose name contains ``query``.
+
+        Args:
+            catalog (ChannelCatalog): The channel catalog.
+            host (str): The host clients reach the proxy on.
+            query (str): The search query.
+
+        Returns:
+            str: The rendered HTML.
+        """
+        channels = catalog.filter(query=query)
+        if len(channels) >= THREAD_RENDER_THRESHOLD:
+            return await asyncio.to_thread(self._render, channels, host, query)
+        return self._render(channels, host, query)
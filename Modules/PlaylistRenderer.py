@@ -0,0 +1,151 @@
+from collections import OrderedDict
+from hashlib import blake2b
+from typing import Optional
+
+import gzip
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from Modules.ChannelCatalog import ChannelCatalog
+
+
+class RenderedBody:
+    """
+    A response body encoded once, with its precompressed variants and a
+    strong ETag per content coding.
+    """
+
+    def __init__(self, body: bytes, media_type: str) -> None:
+        self.media_type = media_type
+        self.encodings = {"identity": body, "gzip": gzip.compress(body, mtime=0)}
+        if brotli is not None:
+            self.encodings["br"] = brotli.compress(body)
+
+        digest = blake2b(body, digest_size=16).hexdigest()
+        self.etags = {
+            encoding: f'"{digest}-{encoding}"' for encoding in self.encodings
+        }
+        self.etags["identity"] = f'"{digest}"'
+
+    @property
+    def body(self) -> bytes:
+        return self.encodings["identity"]
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available) -> str:
+    """
+    Picks the best content encoding the client accepts.
+
+    Args:
+        accept_encoding (str, optional): The ``Accept-Encoding`` request header.
+        available (Iterable[str]): Encodings the body is available in.
+
+    Returns:
+        str: ``br`` or ``gzip`` when accepted and available, else ``identity``.
+    """
+    if not accept_encoding:
+        return "identity"
+
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip().lower()] = quality
+
+    for coding in ("br", "gzip"):
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if coding in available and quality > 0:
+            return coding
+    return "identity"
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Checks an ``If-None-Match`` header against an ETag.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+class PlaylistRenderer:
+    """
+    Renders the channel M3U playlist once per catalog version, host and
+    filter combination, keeping the encoded and compressed bodies.
+    """
+
+    def __init__(self, maxsize: int = 64, catchup_days: int = 1) -> None:
+        self.maxsize = maxsize
+        self.catchup_days = catchup_days
+        self._version = None
+        self._rendered: OrderedDict[tuple, RenderedBody] = OrderedDict()
+
+    def render(
+        self,
+        catalog: ChannelCatalog,
+        host: str,
+        genre: Optional[str] = None,
+        language: Optional[str] = None,
+    ) -> RenderedBody:
+        """
+        Returns the playlist for ``host``, rendering it only on first use.
+
+        Args:
+            catalog (ChannelCatalog): The channel catalog.
+            host (str): The host clients reach the proxy on.
+            genre (str, optional): Only include channels of this genre.
+            language (str, optional): Only include channels in this language.
+
+        Returns:
+            RenderedBody: The rendered playlist.
+        """
+        if catalog.version != self._version:
+            self._rendered.clear()
+            self._version = catalog.version
+
+        key = (
+            host,
+            (genre or "").lower(),
+            (language or "").lower(),
+        )
+        rendered = self._rendered.get(key)
+        if rendered is not None:
+            self._rendered.move_to_end(key)
+            return rendered
+
+        channels = catalog.filter(genre=genre, language=language)
+        lines = [f'#EXTM3U x-tvg-url="http://{host}/jiotv/epg.xml"']
+        for channel in channels:
+            catchup = ""
+            if channel.catchup:
+                catchup = (
+                    f' catchup="default" catchup-days="{self.catchup_days}"'
+                    f' catchup-source="http://{host}/jiotv/catchup?cid={channel.id}&start={{utc}}&end={{utcend}}"'
+                )
+            lines.append(
+                f'#EXTINF:-1 tvg-id="{channel.id}" group-title="{channel.genre}" tvg-logo="{channel.logo}"{catchup},{channel.name}'
+            )
+            lines.append(channel.play_url(host))
+
+        rendered = RenderedBody(
+            "\n".join(lines).encode("utf-8"), media_type="application/x-mpegurl"
+        )
+
+        self._rendered[key] = rendered
+        while len(self._rendered) > self.maxsize:
+            self._rendered.popitem(last=False)
+        return rendered
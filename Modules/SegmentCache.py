@@ -0,0 +1,246 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import AsyncIterator, Awaitable, Callable, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import asyncio
+import httpx
+
+
+# Upstream headers kept with a segment. Bodies are stored as received on the
+# wire, so the encoding and length describe the stored bytes as well.
+PASSTHROUGH_HEADERS = ("content-type", "content-encoding", "content-length")
+
+
+def normalize_uri(uri: str) -> str:
+    """
+    Normalizes a segment URI so that equivalent URIs share a cache slot.
+
+    Scheme and host are lower-cased, default ports and fragments are dropped
+    and duplicate slashes in the path are collapsed.
+
+    Args:
+        uri (str): The upstream segment URI.
+
+    Returns:
+        str: The normalized URI.
+    """
+    parts = urlsplit(uri.strip())
+    netloc = parts.netloc.lower()
+    if parts.scheme == "https" and netloc.endswith(":443"):
+        netloc = netloc[:-4]
+    elif parts.scheme == "http" and netloc.endswith(":80"):
+        netloc = netloc[:-3]
+
+    segment_path = parts.path
+    while "//" in segment_path:
+        segment_path = segment_path.replace("//", "/")
+
+    return urlunsplit((parts.scheme.lower(), netloc, segment_path, parts.query, ""))
+
+
+class CachedSegment:
+    """
+    A segment that is either being downloaded or fully buffered in memory.
+
+    Readers iterate over the chunks buffered so far and then wait for the
+    download task to append more, so late joiners never trigger a second
+    upstream fetch.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        self.chunks: list[bytes] = []
+        self.size = 0
+        self.status_code = 0
+        self.headers: dict[str, str] = {}
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.expires_at = 0.0
+        self._headers_ready = asyncio.Event()
+        self._data_ready = asyncio.Event()
+        self._finished = asyncio.Event()
+
+    def _notify(self) -> None:
+        data_ready = self._data_ready
+        self._data_ready = asyncio.Event()
+        data_ready.set()
+
+    def set_headers(self, status_code: int, headers: dict[str, str]) -> None:
+        self.status_code = status_code
+        self.headers = headers
+        self._headers_ready.set()
+
+    def append(self, chunk: bytes) -> None:
+        self.chunks.append(chunk)
+        self.size += len(chunk)
+        self._notify()
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.error = error
+        self.done = True
+        self._headers_ready.set()
+        self._finished.set()
+        self._notify()
+
+    async def wait_done(self) -> None:
+        """
+        Waits until the download has completed or failed.
+        """
+        await self._finished.wait()
+
+    async def wait_headers(self) -> None:
+        """
+        Waits until the upstream status and headers are known.
+
+        Raises:
+            BaseException: The error raised by the download task, if it failed
+                before any response was received.
+        """
+        await self._headers_ready.wait()
+        if self.status_code == 0 and self.error is not None:
+            raise self.error
+
+    async def iter_bytes(self) -> AsyncIterator[bytes]:
+        """
+        Yields the segment body, waiting for the in-flight download if needed.
+        """
+        index = 0
+        while True:
+            data_ready = self._data_ready
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+
+            await data_ready.wait()
+
+
+class SegmentCache:
+    """
+    Bounded in-memory cache for HLS segments shared by every client.
+
+    Entries are keyed by the normalized segment URI, expire after ``ttl``
+    seconds and are evicted least-recently-used first once the buffered bytes
+    exceed ``max_bytes``. Concurrent requests for a segment that is still being
+    downloaded attach to the single in-flight fetch.
+
+    Bodies are read with ``aiter_raw`` in ``chunk_size`` pieces, so they are
+    neither decoded nor split into many small chunks.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 256 * 1024 * 1024,
+        ttl: float = 120,
+        chunk_size: int = 256 * 1024,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.chunk_size = chunk_size
+        self.current_bytes = 0
+        self._entries: OrderedDict[str, CachedSegment] = OrderedDict()
+        self._in_flight: dict[str, CachedSegment] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def __contains__(self, uri: str) -> bool:
+        key = normalize_uri(uri)
+        return key in self._in_flight or self._lookup(key) is not None
+
+    def _lookup(self, key: str) -> Optional[CachedSegment]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at < monotonic():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry.size
+
+    def _store(self, entry: CachedSegment) -> None:
+        if entry.size > self.max_bytes:
+            return
+
+        self._remove(entry.key)
+        entry.expires_at = monotonic() + self.ttl
+        self._entries[entry.key] = entry
+        self.current_bytes += entry.size
+
+        while self.current_bytes > self.max_bytes and self._entries:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.current_bytes = 0
+
+    async def _download(
+        self,
+        entry: CachedSegment,
+        open_stream: Callable[[], Awaitable[httpx.Response]],
+    ) -> None:
+        resp = None
+        try:
+            resp = await open_stream()
+            entry.set_headers(
+                resp.status_code,
+                {
+                    name: resp.headers[name]
+                    for name in PASSTHROUGH_HEADERS
+                    if name in resp.headers
+                },
+            )
+            async for chunk in resp.aiter_raw(self.chunk_size):
+                entry.append(chunk)
+        except Exception as e:
+            entry.finish(error=e)
+        else:
+            entry.finish()
+            if entry.status_code == 200:
+                self._store(entry)
+        finally:
+            self._in_flight.pop(entry.key, None)
+            if resp is not None:
+                await resp.aclose()
+
+    def fetch(
+        self,
+        uri: str,
+        open_stream: Callable[[], Awaitable[httpx.Response]],
+    ) -> CachedSegment:
+        """
+        Returns the cached or in-flight segment for ``uri``, starting a
+        download with ``open_stream`` if neither exists.
+
+        The download runs as its own task, so a client disconnecting does not
+        cancel the fetch other clients are waiting on.
+
+        Args:
+            uri (str): The upstream segment URI.
+            open_stream (Callable): Coroutine factory returning a streamed
+                ``httpx.Response`` for the segment.
+
+        Returns:
+            CachedSegment: The segment to stream from.
+        """
+        key = normalize_uri(uri)
+
+        entry = self._in_flight.get(key) or self._lookup(key)
+        if entry is not None:
+            return entry
+
+        entry = CachedSegment(key)
+        self._in_flight[key] = entry
+        task = asyncio.create_task(self._download(entry, open_stream))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return entry
@@ -0,0 +1,103 @@
+from time import monotonic
+from typing import Callable
+
+import asyncio
+
+from Modules.SegmentCache import CachedSegment
+
+
+class _VariantState:
+    def __init__(self) -> None:
+        self.cid = ""
+        self.cookie = ""
+        self.segment_uris: list[str] = []
+        self.key_uris: list[str] = []
+        self.last_poll = monotonic()
+        self.wake = asyncio.Event()
+
+
+class SegmentPrefetcher:
+    """
+    Warms the segment cache ahead of the players for live variant playlists.
+
+    Every time a variant playlist is served the newest ``segments`` segments and
+    its AES keys are fetched in the background, one variant at a time, so the
+    player's own segment requests are answered from the local buffer. A
+    variant's worker stops once nobody has polled it for ``idle_timeout``
+    seconds.
+    """
+
+    def __init__(
+        self,
+        fetch_segment: Callable[[str, str, str], CachedSegment],
+        fetch_key: Callable[[str, str, str], CachedSegment],
+        segments: int = 3,
+        idle_timeout: float = 30,
+    ) -> None:
+        self.fetch_segment = fetch_segment
+        self.fetch_key = fetch_key
+        self.segments = segments
+        self.idle_timeout = idle_timeout
+        self._variants: dict[str, _VariantState] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def notify(
+        self,
+        variant_uri: str,
+        cid: str,
+        cookie: str,
+        segment_uris: list[str],
+        key_uris: list[str],
+    ) -> None:
+        """
+        Records a poll of a variant playlist and schedules prefetching of its
+        newest segments.
+
+        Args:
+            variant_uri (str): The upstream URI of the variant playlist.
+            cid (str): The channel ID.
+            cookie (str): The cookie value.
+            segment_uris (list[str]): Absolute segment URIs, oldest first.
+            key_uris (list[str]): Absolute AES key URIs.
+        """
+        state = self._variants.get(variant_uri)
+        if state is None:
+            state = _VariantState()
+            self._variants[variant_uri] = state
+            task = asyncio.create_task(self._run(variant_uri, state))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        state.cid = cid
+        state.cookie = cookie
+        state.segment_uris = segment_uris[-self.segments :]
+        state.key_uris = key_uris
+        state.last_poll = monotonic()
+        state.wake.set()
+
+    async def _run(self, variant_uri: str, state: _VariantState) -> None:
+        try:
+            while True:
+                remaining = state.last_poll + self.idle_timeout - monotonic()
+                if remaining <= 0:
+                    break
+
+                try:
+                    await asyncio.wait_for(state.wake.wait(), timeout=remaining)
+                except asyncio.TimeoutError:
+                    continue
+                state.wake.clear()
+
+                for key_uri in state.key_uris:
+                    await self.fetch_key(key_uri, state.cid, state.cookie).wait_done()
+
+                for segment_uri in state.segment_uris:
+                    await self.fetch_segment(
+                        segment_uri, state.cid, state.cookie
+                    ).wait_done()
+        finally:
+            self._variants.pop(variant_uri, None)
+
+    def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
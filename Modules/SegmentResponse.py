@@ -0,0 +1,104 @@
+from typing import Optional
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from Modules.HTTPRange import content_range, parse_range
+from Modules.SegmentCache import CachedSegment
+
+
+class SegmentResponse(Response):
+    """
+    Streams a ``CachedSegment`` straight to the ASGI server.
+
+    The upstream bytes are passed through as received, without re-encoding,
+    and ``Content-Length``/``Content-Encoding`` are forwarded so clients get a
+    sized, non-chunked response. Unlike ``StreamingResponse`` no disconnect
+    listener task is started per request; a send failing on a closed
+    connection ends the response instead.
+
+    Once the segment size is known a single-range ``Range`` header is served
+    from the buffered bytes as a 206, and ``head`` sends the headers only.
+    ``public`` lets shared caches store successful responses too.
+
+    Raises:
+        RangeNotSatisfiable: If ``range_header`` selects no byte of the segment.
+    """
+
+    def __init__(
+        self,
+        segment: CachedSegment,
+        media_type: Optional[str] = None,
+        max_age: int = 0,
+        range_header: Optional[str] = None,
+        head: bool = False,
+        public: bool = False,
+    ) -> None:
+        self.segment = segment
+        self.status_code = segment.status_code
+        self.media_type = segment.headers.get("content-type", media_type)
+        self.background = None
+        self.head = head
+        self.byte_range = None
+
+        headers = {}
+        content_length = (
+            str(segment.size) if segment.done else segment.headers.get("content-length")
+        )
+        if segment.status_code == 200:
+            headers["accept-ranges"] = "bytes"
+            if content_length is not None:
+                self.byte_range = parse_range(range_header, int(content_length))
+        if self.byte_range is not None:
+            start, end = self.byte_range
+            self.status_code = 206
+            headers["content-range"] = content_range(start, end, int(content_length))
+            content_length = str(end - start + 1)
+
+        if content_length is not None:
+            headers["content-length"] = content_length
+        if "content-encoding" in segment.headers:
+            headers["content-encoding"] = segment.headers["content-encoding"]
+        if segment.status_code == 200 and max_age > 0:
+            scope = "public" if public else "private"
+            headers["cache-control"] = f"{scope}, max-age={max_age}"
+        else:
+            headers["cache-control"] = "private, no-store"
+
+        self.init_headers(headers)
+
+    async def _iter_body(self):
+        if self.byte_range is None:
+            async for chunk in self.segment.iter_bytes():
+                yield chunk
+            return
+
+        start, end = self.byte_range
+        offset = 0
+        async for chunk in self.segment.iter_bytes():
+            chunk_start, offset = offset, offset + len(chunk)
+            if offset <= start:
+                continue
+            if chunk_start < start or offset > end + 1:
+                chunk = chunk[max(start - chunk_start, 0) : end + 1 - chunk_start]
+            yield chunk
+            if offset > end:
+                return
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": self.status_code,
+                    "headers": self.raw_headers,
+                }
+            )
+            if not self.head:
+                async for chunk in self._iter_body():
+                    await send(
+                        {"type": "http.response.body", "body": chunk, "more_body": True}
+                    )
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        except OSError:
+            return
@@ -0,0 +1,93 @@
+from os import path
+from time import time
+
+import asyncio
+import json
+import sqlite3
+
+from Modules.AtomicFile import atomic_write
+
+SESSION_FILE = path.join("data", "session.json")
+HEADERS_FILE = path.join("data", "jio_headers.json")
+LEGACY_CREDS_DB = "creds.db"
+SESSION_LIFETIME = 3600
+
+
+class SessionManager:
+    """
+    Keeps the logged-in phone number, session expiry and auth state in memory.
+
+    State is loaded from disk once and every change is persisted with an
+    atomic write, so request handlers never touch the filesystem or a
+    database to check whether the proxy is logged in.
+    """
+
+    def __init__(
+        self,
+        session_file: str = SESSION_FILE,
+        headers_file: str = HEADERS_FILE,
+        legacy_db: str = LEGACY_CREDS_DB,
+    ) -> None:
+        self.session_file = session_file
+        self.headers_file = headers_file
+        self.legacy_db = legacy_db
+
+        self.phone_number = ""
+        self.expire = 0.0
+        self.authenticated = False
+
+        self.load()
+
+    def load(self) -> None:
+        """
+        Loads the session from ``session_file``, migrating it from the legacy
+        sqlite credential store the first time.
+        """
+        if path.exists(self.session_file):
+            with open(self.session_file, "r") as f:
+                session = json.load(f)
+            self.phone_number = session.get("phone_number", "")
+            self.expire = session.get("expire", 0)
+
+        elif path.exists(self.legacy_db):
+            db = sqlite3.connect(self.legacy_db)
+            try:
+                row = db.execute("SELECT phone_number, expire FROM creds").fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            finally:
+                db.close()
+
+            if row:
+                self.phone_number, self.expire = row[0] or "", row[1] or 0
+                self._write()
+
+        self.authenticated = path.exists(self.headers_file)
+
+    def _write(self) -> None:
+        with atomic_write(self.session_file) as f:
+            json.dump({"phone_number": self.phone_number, "expire": self.expire}, f)
+
+    async def _persist(self) -> None:
+        await asyncio.to_thread(self._write)
+
+    async def store(self, phone_number: str) -> None:
+        """
+        Records a successful login.
+
+        Args:
+            phone_number (str): The phone number that logged in.
+        """
+        self.phone_number = phone_number
+        self.expire = time() + SESSION_LIFETIME
+        self.authenticated = True
+        await self._persist()
+
+    async def update_expire_time(self) -> None:
+        self.expire = time() + SESSION_LIFETIME
+        await self._persist()
+
+    async def clear(self) -> None:
+        self.phone_number = ""
+        self.expire = 0
+        await self._persist()
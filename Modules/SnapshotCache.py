@@ -0,0 +1,157 @@
+from os import path
+from time import time
+from typing import Any, Awaitable, Callable, Optional
+
+import asyncio
+import pickle
+
+from httpx import AsyncClient, Request, Response
+
+from Modules.AtomicFile import atomic_write
+
+# Bump whenever the layout of stored data changes; older snapshots are ignored.
+SNAPSHOT_VERSION = 2
+
+
+class Snapshot:
+    """
+    Upstream data persisted to disk with the validators needed to revalidate
+    it conditionally.
+
+    Callers that keep only derived structures may set ``data`` to None; the
+    validators keep working and the data stays on disk.
+    """
+
+    def __init__(
+        self,
+        data: Any,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+        fetched_at: float = 0,
+    ) -> None:
+        self.data = data
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+
+    @property
+    def age(self) -> float:
+        return time() - self.fetched_at
+
+
+def load_snapshot(file_path: str) -> Optional[Snapshot]:
+    """
+    Loads a snapshot written by ``save_snapshot``.
+
+    Returns:
+        Optional[Snapshot]: The snapshot, or None if the file is missing,
+            unreadable or from another ``SNAPSHOT_VERSION``.
+    """
+    if not path.exists(file_path):
+        return None
+    try:
+        with open(file_path, "rb") as f:
+            version, etag, last_modified, fetched_at, data = pickle.load(f)
+    except Exception:
+        return None
+    if version != SNAPSHOT_VERSION:
+        return None
+    return Snapshot(data, etag, last_modified, fetched_at)
+
+
+def save_snapshot(file_path: str, snapshot: Snapshot) -> None:
+    """
+    Atomically writes a snapshot to ``file_path``.
+    """
+    record = (
+        SNAPSHOT_VERSION,
+        snapshot.etag,
+        snapshot.last_modified,
+        snapshot.fetched_at,
+        snapshot.data,
+    )
+    with atomic_write(file_path, "wb") as f:
+        pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def touch_snapshot(file_path: str, fetched_at: float) -> None:
+    """
+    Updates the fetch time of the snapshot stored at ``file_path``, if any.
+    """
+    snapshot = load_snapshot(file_path)
+    if snapshot is not None:
+        snapshot.fetched_at = fetched_at
+        save_snapshot(file_path, snapshot)
+
+
+async def revalidate_snapshot(
+    client: AsyncClient,
+    url: str,
+    headers: Callable[[], dict],
+    file_path: str,
+    parse: Callable[[Response], Awaitable[Any]],
+    snapshot: Optional[Snapshot] = None,
+    send: Optional[Callable[..., Awaitable[Response]]] = None,
+) -> Snapshot:
+    """
+    Fetches ``url`` conditionally against a stored snapshot and persists the
+    result.
+
+    Args:
+        client (AsyncClient): The client to build requests with.
+        url (str): The upstream URL.
+        headers (Callable): Returns the request headers; called again for
+            every attempt.
+        file_path (str): Where the snapshot is stored.
+        parse (Callable): Coroutine function turning a streamed 200 response
+            into the data to store.
+        snapshot (Snapshot, optional): The current snapshot, loaded from
+            ``file_path`` if not given. Its ``data`` may be None, in which
+            case a 304 only updates the fetch time stored on disk.
+        send (Callable, optional): Called as ``send(build_request,
+            stream=True)`` to send the request, e.g. to retry it after a
+            token refresh. Defaults to sending once with ``client``.
+
+    Returns:
+        Snapshot: The unchanged snapshot with a new ``fetched_at`` on 304, or a
+            new snapshot on 200.
+    """
+    if snapshot is None:
+        snapshot = await asyncio.to_thread(load_snapshot, file_path)
+    elif snapshot.data is None and not path.exists(file_path):
+        # Nothing to fall back to on a 304, so fetch unconditionally.
+        snapshot = None
+
+    validators = {}
+    if snapshot is not None:
+        if snapshot.etag:
+            validators["If-None-Match"] = snapshot.etag
+        if snapshot.last_modified:
+            validators["If-Modified-Since"] = snapshot.last_modified
+
+    def build_request() -> Request:
+        return client.build_request("GET", url, headers={**headers(), **validators})
+
+    if send is None:
+        resp = await client.send(build_request(), stream=True)
+    else:
+        resp = await send(build_request, stream=True)
+    try:
+        if resp.status_code == 304 and snapshot is not None:
+            snapshot.fetched_at = time()
+            if snapshot.data is None:
+                await asyncio.to_thread(touch_snapshot, file_path, snapshot.fetched_at)
+                return snapshot
+        else:
+            resp.raise_for_status()
+            snapshot = Snapshot(
+                await parse(resp),
+                etag=resp.headers.get("etag"),
+                last_modified=resp.headers.get("last-modified"),
+                fetched_at=time(),
+            )
+    finally:
+        await resp.aclose()
+
+    await asyncio.to_thread(save_snapshot, file_path, snapshot)
+    return snapshot
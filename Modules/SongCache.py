@@ -0,0 +1,124 @@
+from collections import OrderedDict
+from os import listdir, makedirs, path, remove, stat, utime
+from typing import AsyncIterator, Optional
+
+import asyncio
+import httpx
+
+from Modules.AtomicFile import atomic_write
+
+
+class SongCache:
+    """
+    Size-bounded LRU cache of song audio files on local disk.
+
+    Each song is stored as ``<song_id>.mp4`` in ``directory``. The LRU order
+    lives in memory and is restored from file modification times on start,
+    which are bumped on every hit. Songs are filled by teeing the upstream
+    response a client is already being served into a temporary file, which
+    is only renamed into place once the body is complete.
+    """
+
+    SUFFIX = ".mp4"
+
+    def __init__(
+        self, directory: str, max_bytes: int, chunk_size: int = 256 * 1024
+    ) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self.current_bytes = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        self._filling: set[str] = set()
+
+        makedirs(directory, exist_ok=True)
+        files = []
+        for name in listdir(directory):
+            file_path = path.join(directory, name)
+            if not name.endswith(self.SUFFIX):
+                if name.endswith(".tmp"):
+                    remove(file_path)
+                continue
+            info = stat(file_path)
+            files.append((info.st_mtime, name[: -len(self.SUFFIX)], info.st_size))
+
+        for _, song_id, size in sorted(files):
+            self._entries[song_id] = size
+            self.current_bytes += size
+        self._evict()
+
+    def _path(self, song_id: str) -> str:
+        return path.join(self.directory, song_id + self.SUFFIX)
+
+    def _evict(self) -> None:
+        while self.current_bytes > self.max_bytes and self._entries:
+            song_id, size = self._entries.popitem(last=False)
+            self.current_bytes -= size
+            try:
+                remove(self._path(song_id))
+            except FileNotFoundError:
+                pass
+
+    def get(self, song_id: str) -> Optional[str]:
+        """
+        Returns the path of a cached song and marks it as recently used.
+
+        Args:
+            song_id (str): The song ID.
+
+        Returns:
+            Optional[str]: The file path, or None if the song is not cached.
+        """
+        if song_id not in self._entries:
+            return None
+        self._entries.move_to_end(song_id)
+        file_path = self._path(song_id)
+        try:
+            utime(file_path)
+        except FileNotFoundError:
+            self.current_bytes -= self._entries.pop(song_id)
+            return None
+        return file_path
+
+    def filling(self, song_id: str) -> bool:
+        """
+        Whether a response for the song is currently being teed into the cache.
+        """
+        return song_id in self._filling
+
+    def _add(self, song_id: str) -> None:
+        file_path = self._path(song_id)
+        size = path.getsize(file_path)
+        self.current_bytes -= self._entries.pop(song_id, 0)
+        if size > self.max_bytes:
+            remove(file_path)
+            return
+        self.current_bytes += size
+        self._entries[song_id] = size
+        self._evict()
+
+    async def tee(self, song_id: str, resp: httpx.Response) -> AsyncIterator[bytes]:
+        """
+        Relays a streamed full-song response while writing it to the cache.
+
+        The song is only cached if the whole body was read, so a client
+        disconnecting early leaves nothing behind. The response is closed
+        when the iteration ends.
+
+        Args:
+            song_id (str): The song ID.
+            resp (httpx.Response): A streamed 200 response for the whole song.
+
+        Yields:
+            bytes: The raw upstream body.
+        """
+        self._filling.add(song_id)
+        try:
+            with atomic_write(self._path(song_id), "wb") as f:
+                async for chunk in resp.aiter_raw(self.chunk_size):
+                    await asyncio.to_thread(f.write, chunk)
+                    yield chunk
+        finally:
+            self._filling.discard(song_id)
+            await resp.aclose()
+        self._add(song_id)
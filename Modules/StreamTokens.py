@@ -0,0 +1,56 @@
+from base64 import urlsafe_b64encode
+from collections import OrderedDict
+from hashlib import blake2b
+from secrets import token_bytes
+from typing import Optional
+
+
+class StreamTokenTable:
+    """
+    In-process table of short opaque tokens standing in for the
+    ``(base_url, cid, cookie)`` triple every segment request needs.
+
+    Tokens are a hash of the triple keyed with a random per-process key, so
+    the same playlist directory and cookie always map to the same token and
+    segment URLs stay stable across playlist refreshes, while tokens cannot
+    be derived from a known triple.
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._key = token_bytes(16)
+        self._contexts: OrderedDict[str, tuple[str, str, str]] = OrderedDict()
+
+    def register(self, base_url: str, cid: str, cookie: str) -> str:
+        """
+        Returns the token for a stream context, storing it if it is new.
+
+        Args:
+            base_url (str): The upstream directory segments are served from.
+            cid (str): The channel ID.
+            cookie (str): The cookie value.
+
+        Returns:
+            str: A 12 character URL-safe token.
+        """
+        context = (base_url, str(cid), cookie)
+        digest = blake2b(
+            "\0".join(context).encode(), digest_size=9, key=self._key
+        ).digest()
+        token = urlsafe_b64encode(digest).decode("ascii")
+
+        if token in self._contexts:
+            self._contexts.move_to_end(token)
+        else:
+            self._contexts[token] = context
+            while len(self._contexts) > self.maxsize:
+                self._contexts.popitem(last=False)
+
+        return token
+
+    def resolve(self, token: str) -> Optional[tuple[str, str, str]]:
+        """
+        Returns the ``(base_url, cid, cookie)`` triple of a token, or None if it
+        is unknown or has been evicted.
+        """
+        return self._contexts.get(token)
@@ -0,0 +1,175 @@
+"""
+JioSaavn model validation benchmark.
+
+Builds a deterministic synthetic fixture shaped like the homepage and
+playlist API responses, with HTML entities in a share of the names, and
+times validation, ``model_dump`` and ``NewAlbumItem.artists`` access.
+
+``--dump`` writes the serialized models as sorted JSON and prints its
+SHA-256, so output can be compared between revisions:
+
+    python benchmarks/jiosaavn_validation.py --dump /tmp/after.json
+    git stash  # or check out the revision to compare against
+    python benchmarks/jiosaavn_validation.py --dump /tmp/before.json
+    cmp /tmp/before.json /tmp/after.json
+
+Usage:
+    python benchmarks/jiosaavn_validation.py [--dump PATH] [--fixture PATH]
+"""
+
+from hashlib import sha256
+from os import path
+from time import perf_counter
+
+import argparse
+import json
+import random
+import sys
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from models.JioSaavn import HomeModels, PlaylistDetailsModel
+
+NAMES = [
+    "Rock &amp; Roll",
+    "Kaadhal &quot;Song&quot;",
+    "Plain Title",
+    "A. R. Rahman",
+    "Anirudh &amp; Co",
+]
+
+
+def build_fixture(seed: int = 7) -> dict:
+    """
+    Returns 1000 new albums with three artists each, 50 charts, 50 featured
+    playlists and a 1000 song playlist.
+    """
+    rng = random.Random(seed)
+
+    def text(length):
+        return "".join(rng.choices("abcdefghij klmnop", k=length))
+
+    def name():
+        return rng.choice(NAMES)
+
+    albums = [
+        {
+            "query": text(10),
+            "text": name(),
+            "year": "2024",
+            "image": f"https://c.saavncdn.com/{i}/x-150x150.jpg",
+            "albumid": str(i),
+            "title": name(),
+            "Artist": {
+                "music": [{"id": str(i * 10 + j), "name": name()} for j in range(3)]
+            },
+            "weight": i,
+            "language": "tamil",
+        }
+        for i in range(1000)
+    ]
+    charts = [
+        {
+            "listid": str(i),
+            "listname": name(),
+            "image": "https://c/x.jpg",
+            "weight": i,
+            "songs": [{"name": name(), "image": "https://c/y.jpg"} for _ in range(3)],
+            "perma_url": "https://x",
+        }
+        for i in range(50)
+    ]
+    featured_playlists = [
+        {
+            "listid": str(i),
+            "secondary_subtitle": name(),
+            "firstname": name(),
+            "listname": name(),
+            "data_type": "playlist",
+            "count": 10,
+            "image": "https://c/z.jpg",
+            "sponsored": False,
+            "perma_url": "https://x",
+            "follower_count": "12",
+            "uid": "u",
+            "last_updated": 1700000000,
+        }
+        for i in range(50)
+    ]
+    songs = [
+        {
+            "id": str(i),
+            "song": name(),
+            "album": name(),
+            "albumid": str(i),
+            "year": "2023",
+            "primary_artists": "A &amp; B, C",
+            "primary_artists_id": "1, 2",
+            "image": "https://c/a-150x150.jpg",
+            "language": "tamil",
+        }
+        for i in range(1000)
+    ]
+    return {
+        "home": {
+            "new_albums": albums,
+            "featured_playlists": featured_playlists,
+            "charts": charts,
+        },
+        "playlist": {
+            "listid": "1",
+            "listname": name(),
+            "image": "https://c/p.jpg",
+            "list_count": "1000",
+            "songs": songs,
+            "last_updated": 1700000000,
+        },
+    }
+
+
+def best(fn, items: int, repeat: int = 15):
+    # Returns the last result and the best time in milliseconds per 1k items.
+    fastest = float("inf")
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn()
+        fastest = min(fastest, perf_counter() - start)
+    return result, fastest * 1000 / items * 1000
+
+
+def main(dump: str = None, fixture: str = None) -> None:
+    data = build_fixture()
+    if fixture:
+        with open(fixture, "w") as f:
+            json.dump(data, f)
+    home, playlist = data["home"], data["playlist"]
+    home_items = len(home["new_albums"]) + 100
+
+    homepage, ms = best(
+        lambda: HomeModels.HomePageResponse.model_validate(home), home_items
+    )
+    print(f"homepage validation         {ms:7.3f} ms per 1k items")
+    _, ms = best(homepage.model_dump, home_items)
+    print(f"homepage model_dump         {ms:7.3f} ms per 1k items")
+    _, ms = best(lambda: [album.artists for album in homepage.new_albums], 1000)
+    print(f"NewAlbumItem.artists access {ms:7.3f} ms per 1k accesses")
+    detail, ms = best(
+        lambda: PlaylistDetailsModel.PlaylistDetail.model_validate(playlist), 1000
+    )
+    print(f"playlist validation         {ms:7.3f} ms per 1k items")
+
+    if dump:
+        output = json.dumps(
+            [homepage.model_dump(), detail.model_dump()], sort_keys=True
+        ).encode()
+        with open(dump, "wb") as f:
+            f.write(output)
+        print(f"serialized output sha256    {sha256(output).hexdigest()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--dump", help="Write the serialized models to this file.")
+    parser.add_argument("--fixture", help="Write the fixture JSON to this file.")
+    args = parser.parse_args()
+    main(dump=args.dump, fixture=args.fixture)
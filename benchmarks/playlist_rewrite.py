@@ -0,0 +1,101 @@
+"""
+Playlist rewriting benchmark: m3u8 + str.replace vs ``rewrite_playlist``.
+
+Rewrites DVR-length variant playlists with an AES key every 50 segments,
+the way ``final_play`` proxies segment and key URIs. The old approach parsed
+the playlist with the ``m3u8`` package and called ``str.replace`` once per
+URI; it is only timed when ``m3u8`` is installed.
+
+Usage:
+    python benchmarks/playlist_rewrite.py
+"""
+
+from os import path
+from timeit import repeat
+
+import sys
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+try:
+    import m3u8
+except ImportError:
+    m3u8 = None
+
+from Modules.M3U8Rewriter import KEY, SEGMENT, resolve_uri, rewrite_playlist
+
+BASE_URL = "https://jiotvmblive.cdn.jio.com/bpk-tv/Colors_HD/WDVLive"
+CID = "144"
+COOKIE = "__hdnea__=st=1~exp=2~acl=/*~hmac=" + "a" * 64
+
+
+def make_playlist(segments: int) -> str:
+    lines = [
+        "#EXTM3U",
+        "#EXT-X-VERSION:3",
+        "#EXT-X-TARGETDURATION:6",
+        "#EXT-X-MEDIA-SEQUENCE:100",
+    ]
+    for i in range(segments):
+        if i % 50 == 0:
+            lines.append(
+                "#EXT-X-KEY:METHOD=AES-128,"
+                f'URI="https://tv.media.jio.com/streams_live/key_{i // 50}.key"'
+            )
+        lines.append("#EXTINF:6.000,")
+        lines.append(f"Colors_HD-audio_108038_hin=108000-video=2297600-{1000 + i}.ts")
+    return "\n".join(lines) + "\n"
+
+
+def m3u8_replace(playlist: str) -> str:
+    parsed = m3u8.loads(playlist)
+    text = playlist
+    for segment in parsed.segments:
+        text = text.replace(
+            segment.uri,
+            f"/jiotv/get_ts?uri={BASE_URL}/{segment.uri}&cid={CID}&cookie={COOKIE}",
+        )
+    for key in parsed.keys:
+        if key is not None:
+            text = text.replace(
+                key.uri, f"/jiotv/get_key?uri={key.uri}&cid={CID}&cookie={COOKIE}"
+            )
+    return text
+
+
+def single_pass(playlist: str) -> str:
+    def rewrite(kind, uri):
+        uri = resolve_uri(BASE_URL, uri)
+        if kind == SEGMENT:
+            return f"/jiotv/get_ts?uri={uri}&cid={CID}&cookie={COOKIE}"
+        if kind == KEY:
+            return f"/jiotv/get_key?uri={uri}&cid={CID}&cookie={COOKIE}"
+
+    return rewrite_playlist(playlist, rewrite)
+
+
+def best_ms(fn, playlist: str, runs: int) -> float:
+    return min(repeat(lambda: fn(playlist), number=1, repeat=runs)) * 1000
+
+
+def main() -> None:
+    if m3u8 is not None:
+        small = make_playlist(10)
+        identical = m3u8_replace(small) == single_pass(small)
+        print(f"output identical on 10 segments: {identical}")
+    else:
+        print("m3u8 is not installed, timing rewrite_playlist only")
+
+    print("segments  m3u8 + replace  rewrite_playlist")
+    for segments in (10, 900, 3600):
+        playlist = make_playlist(segments)
+        runs = 3 if segments > 1000 else 10
+        old = "-"
+        if m3u8 is not None:
+            old = f"{best_ms(m3u8_replace, playlist, runs):.1f} ms"
+        new = best_ms(single_pass, playlist, runs)
+        print(f"{segments:8d}  {old:>14s}  {new:13.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Segment streaming benchmark: StreamingResponse vs SegmentResponse.
+
+Serves a 2 MiB segment from a local asyncio fake upstream through
+``SegmentCache`` and uvicorn, downloads it sequentially with curl and reports
+server CPU time per segment and throughput, for cache misses and hits.
+
+Usage:
+    python benchmarks/segment_streaming.py [--requests 200]
+
+Requires uvicorn and the curl command line tool.
+"""
+
+from os import path, urandom
+from time import perf_counter, process_time
+
+import argparse
+import asyncio
+import sys
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+
+from Modules.SegmentCache import SegmentCache
+from Modules.SegmentResponse import SegmentResponse
+
+SEGMENT = urandom(2 * 1024 * 1024)
+UPSTREAM_PORT = 8765
+PROXY_PORT = 8766
+
+
+async def fake_upstream(reader, writer):
+    # Answers every keep-alive request on the connection with the segment.
+    try:
+        while await reader.readline():
+            while await reader.readline() not in (b"\r\n", b""):
+                pass
+            writer.write(
+                b"HTTP/1.1 200 OK\r\ncontent-type: video/MP2T\r\n"
+                b"content-length: %d\r\n\r\n" % len(SEGMENT)
+            )
+            writer.write(SEGMENT)
+            await writer.drain()
+    except ConnectionError:
+        pass
+
+
+def build_app(
+    client: httpx.AsyncClient, mode: str, chunk_size: int, hit: bool
+) -> Starlette:
+    cache = SegmentCache(chunk_size=chunk_size)
+    upstream = f"http://127.0.0.1:{UPSTREAM_PORT}/segment.ts"
+    requests = 0
+
+    async def segment(request):
+        nonlocal requests
+        requests += 1
+        uri = upstream if hit else f"{upstream}?n={requests}"
+        entry = cache.fetch(
+            uri, lambda: client.send(client.build_request("GET", uri), stream=True)
+        )
+        await entry.wait_headers()
+        if mode == "SegmentResponse":
+            return SegmentResponse(entry, media_type="video/MP2T", max_age=120)
+        return StreamingResponse(entry.iter_bytes(), media_type="video/MP2T")
+
+    return Starlette(routes=[Route("/segment.ts", segment)])
+
+
+async def run(mode: str, chunk_size: int, hit: bool, requests: int) -> str:
+    client = httpx.AsyncClient()
+    app = build_app(client, mode, chunk_size, hit)
+    server = uvicorn.Server(
+        uvicorn.Config(app, port=PROXY_PORT, log_level="error", lifespan="off")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    url = f"http://127.0.0.1:{PROXY_PORT}/segment.ts"
+    args = []
+    for _ in range(requests):
+        args += ["-o", "/dev/null", url]
+
+    cpu, wall = process_time(), perf_counter()
+    curl = await asyncio.create_subprocess_exec("curl", "-s", *args)
+    await curl.wait()
+    cpu, wall = process_time() - cpu, perf_counter() - wall
+
+    server.should_exit = True
+    await task
+    await client.aclose()
+    return (
+        f"{'hit' if hit else 'miss':5s} {mode:18s} {chunk_size // 1024:4d}K"
+        f"  {cpu / requests * 1000:6.2f} ms"
+        f"  {requests * len(SEGMENT) / wall / 1e6:6.0f} MB/s"
+    )
+
+
+async def main(requests: int) -> None:
+    upstream = await asyncio.start_server(fake_upstream, "127.0.0.1", UPSTREAM_PORT)
+    print("cache mode               chunk  CPU/segment  throughput")
+    for hit in (False, True):
+        for mode, chunk_size in (
+            ("StreamingResponse", 64 * 1024),
+            ("SegmentResponse", 64 * 1024),
+            ("SegmentResponse", 256 * 1024),
+        ):
+            print(await run(mode, chunk_size, hit, requests))
+    upstream.close()
+    await upstream.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    asyncio.run(main(parser.parse_args().requests))
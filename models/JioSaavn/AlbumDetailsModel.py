@@ -1,5 +1,11 @@
-from pydantic import BaseModel, Field, field_validator, ValidationInfo
-from html import unescape
+from pydantic import BaseModel, Field, field_validator
+
+from models.JioSaavn.Validators import (
+    split_artists,
+    split_ids,
+    unescape_text,
+    upscale_image,
+)
 
 
 class AlbumInput(BaseModel):
@@ -20,14 +26,13 @@ class Song(BaseModel):
     duration: str
     release_date: str
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
-        elif isinstance(value, str):
-            return unescape(value)
-        else:
-            return value
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
+
+    @field_validator("title", "album", "artist", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class AlbumDetail(BaseModel):
@@ -41,20 +46,21 @@ class AlbumDetail(BaseModel):
     perma_url: str
     image: str
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
-        elif (
-            info.field_name == "primary_artists"
-            or info.field_name == "primary_artists_id"
-        ):
-            if info.field_name == "primary_artists":
-                return [unescape(v) for v in value.split(", ")]
-            else:
-                return value.split(", ")
-        else:
-            return unescape(value)
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
+
+    @field_validator("primary_artists", mode="before")
+    def artist_names(cls, value):
+        return split_artists(value)
+
+    @field_validator("primary_artists_id", mode="before")
+    def artist_ids(cls, value):
+        return split_ids(value)
+
+    @field_validator("title", "name", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class AlbumDetails(BaseModel):
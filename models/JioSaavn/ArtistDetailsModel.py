@@ -2,11 +2,10 @@ from pydantic import (
     BaseModel,
     Field,
     field_validator,
-    ValidationInfo,
 )
 
 from models.JioSaavn.SearchModel import Song, Album
-from html import unescape
+from models.JioSaavn.Validators import unescape_text, upscale_image
 
 
 class TopSongs(BaseModel):
@@ -26,16 +25,14 @@ class ArtistDetail(BaseModel):
     top_songs: TopSongs = Field(..., alias="topSongs")
     top_albums: TopAlbums = Field(..., alias="topAlbums")
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
 
-        elif info.field_name == "listeners":
-            return value.split(" ")[-2]
+    @field_validator("listeners", mode="before")
+    def listener_count(cls, value):
+        return value.split(" ")[-2]
 
-        elif isinstance(value, str):
-            return unescape(value)
-
-        else:
-            return value
+    @field_validator("title", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
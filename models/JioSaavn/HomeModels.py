@@ -1,6 +1,8 @@
-from pydantic import BaseModel, computed_field, Field, field_validator, ValidationInfo
+from pydantic import BaseModel, computed_field, Field, field_validator
 from enum import Enum
-from html import unescape
+from functools import cached_property
+
+from models.JioSaavn.Validators import unescape_text, upscale_image
 
 
 class Languages(Enum):
@@ -30,26 +32,18 @@ class Music(BaseModel):
     id: str
     name: str
 
-    @field_validator("*", mode="before")
-    def html_unescape(cls, value: str, info: ValidationInfo):
-        if isinstance(value, str):
-            return unescape(value)
-
-        else:
-            return value
+    @field_validator("name", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class Songs(BaseModel):
     name: str
     image: str
 
-    @field_validator("*", mode="before")
-    def html_unescape(cls, value: str, info: ValidationInfo):
-        if isinstance(value, str):
-            return unescape(value)
-
-        else:
-            return value
+    @field_validator("name", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class ChartItem(BaseModel):
@@ -60,13 +54,9 @@ class ChartItem(BaseModel):
     songs: list[Songs]
     perma_url: str
 
-    @field_validator("*", mode="before")
-    def html_unescape(cls, value: str, info: ValidationInfo):
-        if isinstance(value, str):
-            return unescape(value)
-
-        else:
-            return value
+    @field_validator("listname", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class NewAlbumItem(BaseModel):
@@ -81,20 +71,17 @@ class NewAlbumItem(BaseModel):
     language: str
 
     @computed_field
-    @property
+    @cached_property
     def artists(self) -> list[Music]:
         return [Music(**artist) for artist in self.Artist.get("music")]
 
-    @field_validator("*", mode="before")
-    def html_unescape(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
-
-        elif isinstance(value, str):
-            return unescape(value)
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
 
-        else:
-            return value
+    @field_validator("query", "text", "title", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class FeaturedPlaylistItem(BaseModel):
@@ -111,13 +98,9 @@ class FeaturedPlaylistItem(BaseModel):
     uid: str
     last_updated: int
 
-    @field_validator("*", mode="before")
-    def html_unescape(cls, value: str, info: ValidationInfo):
-        if isinstance(value, str):
-            return unescape(value)
-
-        else:
-            return value
+    @field_validator("secondary_subtitle", "firstname", "listname", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class HomePageResponse(BaseModel):
@@ -1,7 +1,13 @@
-from pydantic import BaseModel, Field, field_validator, ValidationInfo, computed_field
-from html import unescape
+from pydantic import BaseModel, Field, field_validator, computed_field
 from datetime import datetime
 
+from models.JioSaavn.Validators import (
+    split_artists,
+    split_ids,
+    unescape_text,
+    upscale_image,
+)
+
 
 class Song(BaseModel):
     id: str
@@ -14,23 +20,21 @@ class Song(BaseModel):
     image: str
     language: str
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
-
-        elif info.field_name == "artist" or info.field_name == "artist_id":
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
 
-            if info.field_name == "artist":
-                return [unescape(v) for v in value.split(", ")]
-            else:
-                return value.split(", ")
+    @field_validator("artist", mode="before")
+    def artist_names(cls, value):
+        return split_artists(value)
 
-        elif isinstance(value, str):
-            return unescape(value)
+    @field_validator("artist_id", mode="before")
+    def artist_ids(cls, value):
+        return split_ids(value)
 
-        else:
-            return value
+    @field_validator("title", "album", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class PlaylistDetail(BaseModel):
@@ -47,10 +51,6 @@ class PlaylistDetail(BaseModel):
         dt_object = datetime.fromtimestamp(self.last_updated)
         return dt_object.strftime("%Y-%m-%d %I:%M:%S %p")
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if isinstance(value, str):
-            return unescape(value)
-
-        else:
-            return value
+    @field_validator("title", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
@@ -2,10 +2,10 @@ from pydantic import (
     BaseModel,
     Field,
     field_validator,
-    ValidationInfo,
 )
 from enum import Enum
-from html import unescape
+
+from models.JioSaavn.Validators import unescape_text, upscale_image
 
 
 class SearchModes(str, Enum):
@@ -40,16 +40,13 @@ class Song(BaseModel):
     play_count: str
     more_info: MoreInfo
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
-
-        elif isinstance(value, str):
-            return unescape(value)
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
 
-        else:
-            return value
+    @field_validator("title", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class Album(BaseModel):
@@ -60,16 +57,13 @@ class Album(BaseModel):
     language: str
     year: str
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
-
-        elif isinstance(value, str):
-            return unescape(value)
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
 
-        else:
-            return value
+    @field_validator("title", "artist", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class Artist(BaseModel):
@@ -77,16 +71,13 @@ class Artist(BaseModel):
     id: str
     image: str
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("50x50", "500x500")
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value, "50x50")
 
-        elif isinstance(value, str):
-            return unescape(value)
-
-        else:
-            return value
+    @field_validator("title", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
 
 class Playlist(BaseModel):
@@ -94,13 +85,10 @@ class Playlist(BaseModel):
     title: str
     image: str
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
-
-        elif isinstance(value, str):
-            return unescape(value)
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
 
-        else:
-            return value
+    @field_validator("title", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
@@ -1,6 +1,13 @@
-from pydantic import BaseModel, Field, field_validator, ValidationInfo, computed_field
-from html import unescape
+from pydantic import BaseModel, Field, field_validator, computed_field
+from functools import cached_property
+
 from Modules import JioSaavn
+from models.JioSaavn.Validators import (
+    split_artists,
+    split_ids,
+    unescape_text,
+    upscale_image,
+)
 
 
 class SongDetail(BaseModel):
@@ -17,26 +24,23 @@ class SongDetail(BaseModel):
     duration: str
     release_date: str
 
-    @field_validator("*", mode="before")
-    def image_resolution_fix(cls, value: str, info: ValidationInfo):
-        if info.field_name == "image":
-            return value.replace("150x150", "500x500")
-
-        elif info.field_name == "artist" or info.field_name == "artist_id":
+    @field_validator("image", mode="before")
+    def image_resolution_fix(cls, value):
+        return upscale_image(value)
 
-            if info.field_name == "artist":
-                return [unescape(v) for v in value.split(", ")]
-            else:
-                return value.split(", ")
+    @field_validator("artist", mode="before")
+    def artist_names(cls, value):
+        return split_artists(value)
 
-        elif isinstance(value, str):
-            return unescape(value)
+    @field_validator("artist_id", mode="before")
+    def artist_ids(cls, value):
+        return split_ids(value)
 
-        else:
-            return value
+    @field_validator("title", "album", mode="before")
+    def html_unescape(cls, value):
+        return unescape_text(value)
 
     @computed_field
-    @property
+    @cached_property
     def decoded_stream_link(self) -> str:
-        jio_saavn_api = JioSaavn.JioSaavnApi()
-        return jio_saavn_api.decrypt_url(self.encrypted_media_url)
+        return JioSaavn.decrypt_url(self.encrypted_media_url)
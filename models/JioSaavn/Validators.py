@@ -0,0 +1,34 @@
+from html import unescape
+
+
+def unescape_text(value):
+    """
+    Unescapes HTML entities in API text, skipping strings without any.
+    """
+    if isinstance(value, str) and "&" in value:
+        return unescape(value)
+    return value
+
+
+def split_artists(value):
+    """
+    Splits a comma separated artist string into unescaped names.
+    """
+    if isinstance(value, str):
+        return [unescape_text(v) for v in value.split(", ")]
+    return value
+
+
+def split_ids(value):
+    if isinstance(value, str):
+        return value.split(", ")
+    return value
+
+
+def upscale_image(value, size: str = "150x150"):
+    """
+    Points an artwork URL at the 500x500 rendition.
+    """
+    if isinstance(value, str):
+        return value.replace(size, "500x500")
+    return value
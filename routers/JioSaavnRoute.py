@@ -1,10 +1,19 @@
-from typing import Union
+from functools import partial
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, HTTPException, Path, Request
+from fastapi.responses import FileResponse
 
 from fastapi.templating import Jinja2Templates
 
-from Modules.JioSaavn import JioSaavnApi
+from Modules.HTTPRange import proxy_response
+from Modules.JioSaavn import (
+    PROXY_STREAMS,
+    SONG_CACHE_DIR,
+    SONG_CACHE_MAX_BYTES,
+    JioSaavnApi,
+)
+from Modules.SongCache import SongCache
 
 from models.JioSaavn import (
     HomeModels,
@@ -19,11 +28,22 @@ router = APIRouter(tags=["Jio Saavn"])
 templates = Jinja2Templates(directory="templates/JioSaavn")
 
 jio_saavn_api = JioSaavnApi()
+song_cache = None
+
 
 def get_jiosaavn():
     return jio_saavn_api
 
 
+def get_song_cache() -> Optional[SongCache]:
+    # Created on the first proxied stream, so the cache directory is only
+    # touched when streams are actually proxied.
+    global song_cache
+    if song_cache is None and SONG_CACHE_MAX_BYTES > 0:
+        song_cache = SongCache(SONG_CACHE_DIR, SONG_CACHE_MAX_BYTES)
+    return song_cache
+
+
 @router.get("/api/home")
 async def api_homepage(
     language: HomeModels.Languages = HomeModels.Languages.Tamil,
@@ -57,6 +77,19 @@ async def api_song_details(
     return song_detail
 
 
+@router.get("/api/songs_details")
+async def api_songs_details(
+    song_ids: str,
+    jio_saavn: JioSaavnApi = Depends(get_jiosaavn),
+) -> list[SongDetailsModel.SongDetail]:
+    """
+    Returns the details of several songs, given as comma separated IDs.
+    """
+    return await jio_saavn.songs_details(
+        [song_id for song_id in song_ids.split(",") if song_id]
+    )
+
+
 @router.get("/api/album_details")
 async def api_album_details(
     album_id: str,
@@ -108,6 +141,7 @@ async def album_details_ui(
     jio_saavn: JioSaavnApi = Depends(get_jiosaavn),
 ):
     home_page_contents = await jio_saavn.album_details(album_id=album_id)
+    jio_saavn.prefetch_songs([song.id for song in home_page_contents.songs])
     return templates.TemplateResponse(
         "Album_Details.html",
         {
@@ -124,6 +158,7 @@ async def album_details_ui(
     jio_saavn: JioSaavnApi = Depends(get_jiosaavn),
 ):
     home_page_contents = await jio_saavn.playlist_details(playlist_id=playlist_id)
+    jio_saavn.prefetch_songs([song.id for song in home_page_contents.songs])
     return templates.TemplateResponse(
         "playlist_details.html",
         {
@@ -140,6 +175,9 @@ async def album_details_ui(
     jio_saavn: JioSaavnApi = Depends(get_jiosaavn),
 ):
     home_page_contents = await jio_saavn.artist_details(artist_id=artist_id)
+    jio_saavn.prefetch_songs(
+        [song.id for song in home_page_contents.top_songs.songs]
+    )
     return templates.TemplateResponse(
         "artists_details.html",
         {
@@ -161,6 +199,7 @@ async def album_details_ui(
         {
             "request": request,
             "song_details": home_page_contents,
+            "proxy_stream": PROXY_STREAMS,
         },
     )
 
@@ -182,3 +221,49 @@ async def search_ui(
             "query": query,
         },
     )
+
+
+@router.api_route("/stream/{song_id}", methods=["GET", "HEAD"])
+async def stream_song(
+    request: Request,
+    song_id: str = Path(pattern=r"^[\w-]+$"),
+    jio_saavn: JioSaavnApi = Depends(get_jiosaavn),
+    song_cache: Optional[SongCache] = Depends(get_song_cache),
+):
+    """
+    Streams a song's audio through the proxy, serving it from the on-disk song
+    cache when possible. On a miss the request is proxied to the CDN, with
+    ``Range`` forwarded. A GET for the whole song is fetched without a range
+    and teed into the cache as it is relayed, so the song is downloaded once.
+    """
+    if song_cache is not None:
+        file_path = song_cache.get(song_id)
+        if file_path is not None:
+            return FileResponse(file_path, media_type="audio/mp4")
+
+    try:
+        song_detail = await jio_saavn.song_details(song_id=song_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Song not found.")
+    url = song_detail.decoded_stream_link
+
+    range_header = request.headers.get("range")
+    tee = None
+    if (
+        song_cache is not None
+        and request.method == "GET"
+        and range_header in (None, "bytes=0-")
+        and not song_cache.filling(song_id)
+    ):
+        # Answering "bytes=0-" with the full 200 body is allowed and lets the
+        # first play of a song fill the cache.
+        range_header = None
+        tee = partial(song_cache.tee, song_id)
+
+    return await proxy_response(
+        partial(jio_saavn.open_song, url),
+        method=request.method,
+        range_header=range_header,
+        media_type="audio/mp4",
+        tee=tee,
+    )
@@ -1,8 +1,13 @@
 from typing import Optional
 
-from fastapi import APIRouter, Request, Depends, FastAPI
-from fastapi.responses import PlainTextResponse, Response, StreamingResponse
-from starlette.background import BackgroundTask
+from fastapi import APIRouter, Request, Depends, FastAPI, HTTPException
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    PlainTextResponse,
+    Response,
+    StreamingResponse,
+)
 
 from fastapi.templating import Jinja2Templates
 
@@ -11,147 +16,73 @@ from models.JioTV.ExceptionModels import (
     JiotvSessionExpiredException,
 )
 
-from Modules.JioTV import JioTV
-from time import time
-
-from os import path
+from Modules.HTTPRange import (
+    RangeNotSatisfiable,
+    proxy_response,
+    range_not_satisfiable,
+)
+from Modules.JioTV import SEGMENT_CACHE_TTL, SEGMENT_CHUNK_SIZE, JioTV
+from Modules.PageRenderer import ChannelPageRenderer
+from Modules.PlaylistRenderer import RenderedBody, etag_matches, negotiate_encoding
+from Modules.SegmentResponse import SegmentResponse
+from Modules.SessionManager import SessionManager
 
-import sqlite3
 import logging
 
 from contextlib import asynccontextmanager
+from functools import partial
 import asyncio
 
-from scheduler.asyncio import Scheduler
-from datetime import timedelta
-
 logger = logging.getLogger("uvicorn")
 jiotv_obj = JioTV(logger)
+session_manager = SessionManager()
 localip = jiotv_obj.get_local_ip()
 
 
-def convert(m3u_file: str):
-    m3u_json = []
-    lines = m3u_file.split("\n")
-    for line in lines:
-        if line.startswith("#EXTINF"):
-            channelInfo = {}
-            logoStartIndex = line.index('tvg-logo="') + 10
-            logoEndIndex = line.index('"', logoStartIndex)
-            logoUrl = line[logoStartIndex:logoEndIndex]
-            groupTitleStartIndex = line.index('group-title="') + 13
-            groupTitleEndIndex = line.index('"', groupTitleStartIndex)
-            groupTitle = line[groupTitleStartIndex:groupTitleEndIndex]
-            titleStartIndex = line.rindex(",") + 1
-            title = line[titleStartIndex:].strip()
-            link = lines[lines.index(line) + 1]
-            channelInfo["logo"] = logoUrl
-            channelInfo["group_title"] = groupTitle
-            channelInfo["title"] = title
-            channelInfo["link"] = link
-            m3u_json.append(channelInfo)
-    result = m3u_json
-    return result
-
-
-def store_creds(phone_number):
-    # Store the credentials along with expire time in sqlite
-    expire_time = time() + 3600
-    db = sqlite3.connect("creds.db")
-    cursor = db.cursor()
-    cursor.execute(
-        """CREATE TABLE IF NOT EXISTS creds(
-        phone_number TEXT,
-        expire NUMERIC
-    )"""
+def rendered_response(request: Request, rendered: RenderedBody):
+    encoding = negotiate_encoding(
+        request.headers.get("accept-encoding"), rendered.encodings
     )
-    cursor.execute("""INSERT INTO creds VALUES(?,?)""", (phone_number, expire_time))
-    db.commit()
-    db.close()
-
-
-def update_expire_time(phone_number):
-    expire_time = time() + 3600
-
-    db = sqlite3.connect("creds.db")
-    cursor = db.cursor()
-
-    cursor.execute(
-        """UPDATE creds SET expire = ? WHERE phone_number = ?""",
-        (
-            expire_time,
-            phone_number,
-        ),
+    etag = rendered.etags[encoding]
+    headers = {"ETag": etag, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(
+        rendered.encodings[encoding], media_type=rendered.media_type, headers=headers
     )
-    db.commit()
-    db.close()
-
-
-def get_expire():
-    db = sqlite3.connect("creds.db")
-    cursor = db.cursor()
-    cursor.execute("""SELECT expire FROM creds""")
-    row = cursor.fetchone()
-    db.close()
-    return row[0] if row else 0
-
-
-def get_phone_number():
-    db = sqlite3.connect("creds.db")
-    cursor = db.cursor()
-    cursor.execute("""SELECT phone_number FROM creds""")
-    row = cursor.fetchone()
-    db.close()
-    return row[0] if row else ""
-
-
-def clear_creds():
-    db = sqlite3.connect("creds.db")
-    cursor = db.cursor()
-    cursor.execute("""DELETE FROM creds""")
-    db.commit()
-    db.close()
 
 
 async def jiotv_auth_verify():
-    if not path.exists(path.join("data", "jio_headers.json")):
+    if not session_manager.authenticated:
         raise JiotvUnauthorizedException(name="--")
-    else:
-        pass
 
 
-async def background_refresh_token():
-    refreshed_token = await jiotv_obj.refresh_token()
-    if refreshed_token:
-        jiotv_obj.update_headers()
-        logger.info("[*] Session Refreshed.")
+async def on_token_refresh():
+    logger.info("[*] Session Refreshed.")
+    await session_manager.update_expire_time()
 
-        update_expire_time(phone_number=get_phone_number())
-    else:
-        pass
+
+async def background_refresh_token():
+    while True:
+        await asyncio.sleep(jiotv_obj.seconds_until_refresh())
+        await jiotv_obj.refresh_token()
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    def init_db():
-        db = sqlite3.connect("creds.db")
-        cursor = db.cursor()
-        cursor.execute(
-            """CREATE TABLE IF NOT EXISTS creds(
-            phone_number TEXT,
-            expire NUMERIC
-        )"""
-        )
-        db.commit()
-        db.close()
-
-    await asyncio.to_thread(init_db)
-
-    await background_refresh_token()
-    schedule = Scheduler()
-    schedule.cyclic(timedelta(minutes=45), background_refresh_token)
+    jiotv_obj.on_token_refresh = on_token_refresh
+    await jiotv_obj.refresh_token()
+    jiotv_obj.refresh_catalog(from_disk=True)
+    jiotv_obj.epg.start(jiotv_obj.get_catalog)
+    refresh_task = asyncio.create_task(background_refresh_token())
     yield
-    schedule.delete_jobs()
+    refresh_task.cancel()
+    jiotv_obj.epg.stop()
+    if jiotv_obj.prefetcher is not None:
+        jiotv_obj.prefetcher.stop()
     await jiotv_obj.client.aclose()
     from routers.JioSaavnRoute import jio_saavn_api
 
@@ -160,6 +91,7 @@ async def lifespan(app: FastAPI):
 
 router = APIRouter(lifespan=lifespan)
 templates = Jinja2Templates(directory="templates/JioTV")
+page_renderer = ChannelPageRenderer(templates.env.get_template("index.html"))
 
 
 @router.get("/")
@@ -168,17 +100,52 @@ async def index(
     query: Optional[str] = None,
     auth_session=Depends(jiotv_auth_verify),
 ):
-    playlist_response = await jiotv_obj.get_playlists(request.headers.get("host"))
-    channels = convert(playlist_response)
-    search = False
+    catalog = await jiotv_obj.get_catalog()
+    host = request.headers.get("host")
 
     if query != "" and query is not None:
-        channels = [x for x in channels if query.lower() in x["title"].lower()]
-        search = True
+        return HTMLResponse(await page_renderer.search(catalog, host, query))
 
-    return templates.TemplateResponse(
-        "index.html",
-        {"request": request, "channels": channels, "search": search, "query": query},
+    return rendered_response(request, await page_renderer.render(catalog, host))
+
+
+@router.get("/api/channels")
+async def api_channels(
+    request: Request,
+    query: Optional[str] = None,
+    genre: Optional[str] = None,
+    language: Optional[str] = None,
+    hd: Optional[bool] = None,
+    catchup: Optional[bool] = None,
+    auth_session=Depends(jiotv_auth_verify),
+):
+    """
+    Lists channels from the indexed catalog, optionally filtered.
+
+    Parameters:
+    - query: Case-insensitive substring of the channel name.
+    - genre: Genre name, e.g. "News".
+    - language: Language name, e.g. "Tamil".
+    - hd: Only HD (true) or SD (false) channels.
+    - catchup: Only channels with (true) or without (false) catchup.
+
+    Returns:
+    - JSON with the catalog version, the matching channels and their play URLs.
+    """
+    catalog = await jiotv_obj.get_catalog()
+    channels = catalog.filter(
+        query=query, genre=genre, language=language, hd=hd, catchup=catchup
+    )
+    host = request.headers.get("host")
+    return JSONResponse(
+        {
+            "version": catalog.version,
+            "count": len(channels),
+            "channels": [
+                {**channel.to_dict(), "url": channel.play_url(host)}
+                for channel in channels
+            ],
+        }
     )
 
 
@@ -211,24 +178,16 @@ async def createToken(phone_number, otp):
     Returns:
         str: The login response containing the token.
     """
-    if path.exists(path.join("creds.db")):
+    if session_manager.phone_number:
         logger.warning("[!] Creds already available. Clearing existing creds.")
-
-        async def _clear():
-            clear_creds()
-
-        await asyncio.to_thread(_clear)
+        await session_manager.clear()
 
     else:
         logger.info("[-] First Time Logging in.")
 
     login_response = await jiotv_obj.login(phone_number, otp)
     if login_response == "[SUCCESS]":
-
-        async def _store():
-            store_creds(phone_number)
-
-        await asyncio.to_thread(_store)
+        await session_manager.store(phone_number)
         jiotv_obj.update_headers()
         return login_response
 
@@ -252,16 +211,50 @@ async def loginJio(request: Request):
 @router.get("/playlist.m3u")
 async def get_playlist(
     request: Request,
+    genre: Optional[str] = None,
+    language: Optional[str] = None,
     auth_session=Depends(jiotv_auth_verify),
 ):
     """
     Retrieves a playlist in the form of an m3u file.
 
+    Parameters:
+    - genre: Only include channels of this genre.
+    - language: Only include channels in this language.
+
     Returns:
-        A PlainTextResponse object containing the playlist in the specified media type.
+        The pre-rendered playlist, compressed if the client accepts it, or 304
+        if the client's cached copy is still current.
     """
-    playlist_response = await jiotv_obj.get_playlists(request.headers.get("host"))
-    return PlainTextResponse(playlist_response, media_type="application/x-mpegurl")
+    playlist_response = await jiotv_obj.get_playlists(
+        request.headers.get("host"), genre=genre, language=language
+    )
+    return rendered_response(request, playlist_response)
+
+
+@router.get("/epg.xml")
+async def get_epg(
+    request: Request,
+    auth_session=Depends(jiotv_auth_verify),
+):
+    """
+    Retrieves the programme guide of all channels in XMLTV format.
+
+    Returns:
+        A streamed XMLTV document, gzip-compressed if the client accepts it.
+    """
+    compress = (
+        negotiate_encoding(request.headers.get("accept-encoding"), ("gzip",))
+        == "gzip"
+    )
+    headers = {"Vary": "Accept-Encoding"}
+    if compress:
+        headers["Content-Encoding"] = "gzip"
+
+    epg_response = await jiotv_obj.get_epg(compress=compress)
+    return StreamingResponse(
+        epg_response, media_type="application/xml", headers=headers
+    )
 
 
 @router.get("/m3u8")
@@ -283,6 +276,32 @@ async def get_m3u8(
     return PlainTextResponse(channel_response, media_type="application/x-mpegurl")
 
 
+@router.get("/catchup")
+async def get_catchup(
+    cid,
+    start: int,
+    end: Optional[int] = None,
+    auth_session=Depends(jiotv_auth_verify),
+):
+    """
+    Retrieves the m3u8 playlist of a past programme.
+
+    Parameters:
+    - cid: The ID of the channel.
+    - start: Unix timestamp of the programme start, as sent by IPTV players
+      for the catchup-source {utc} placeholder.
+    - end: Unix timestamp of the programme end; accepted for compatibility, the
+      programme boundaries are taken from the guide.
+
+    Returns:
+    - The m3u8 playlist of the programme. (type: PlainTextResponse)
+    """
+    catchup_response = await jiotv_obj.get_catchup_url(cid, start)
+    if catchup_response is None:
+        raise HTTPException(status_code=404, detail="No programme found at that time.")
+    return PlainTextResponse(catchup_response, media_type="application/x-mpegurl")
+
+
 @router.get("/get_audio")
 async def get_multi_audio(
     uri,
@@ -344,55 +363,138 @@ async def get_vtt_(
     return PlainTextResponse(resp, media_type="text/vtt")
 
 
-@router.get("/get_ts")
+async def cached_response(
+    request: Request,
+    uri,
+    get_cached,
+    open_stream,
+    media_type,
+    max_age=SEGMENT_CACHE_TTL,
+    public=False,
+):
+    """
+    Serves a segment or key from the shared cache.
+
+    ``HEAD`` and ``Range`` requests for objects that are neither cached nor
+    being downloaded are proxied upstream as they are, instead of pulling the
+    whole object into the cache. ``public`` marks successful responses as
+    storable by shared caches, for the stable stream token URLs; ``max_age``
+    of 0 forbids storing them at all.
+    """
+    method = request.method
+    range_header = request.headers.get("range")
+    if (method == "HEAD" or range_header) and uri not in jiotv_obj.segment_cache:
+        return await proxy_response(
+            open_stream,
+            method=method,
+            range_header=range_header,
+            media_type=media_type,
+            chunk_size=SEGMENT_CHUNK_SIZE,
+            max_age=max_age,
+            public=public,
+        )
+
+    entry = get_cached()
+    await entry.wait_headers()
+    try:
+        return SegmentResponse(
+            entry,
+            media_type=media_type,
+            max_age=max_age,
+            range_header=range_header,
+            head=method == "HEAD",
+            public=public,
+        )
+    except RangeNotSatisfiable as e:
+        return range_not_satisfiable(e.size)
+
+
+async def segment_response(request: Request, uri, cid, cookie, public=False):
+    return await cached_response(
+        request,
+        uri,
+        lambda: jiotv_obj.get_cached_segment(uri, cid, cookie),
+        partial(jiotv_obj.open_segment, uri, cid, cookie),
+        media_type="video/MP2T",
+        public=public,
+    )
+
+
+async def key_response(request: Request, uri, cid, cookie):
+    # AES keys are cached in-process only and never by downstream caches.
+    return await cached_response(
+        request,
+        uri,
+        lambda: jiotv_obj.get_cached_key(uri, cid, cookie),
+        partial(jiotv_obj.open_key, uri, cid, cookie),
+        media_type="application/octet-stream",
+        max_age=0,
+    )
+
+
+def resolve_token_uri(request: Request, token: str, name: str):
+    context = jiotv_obj.stream_tokens.resolve(token)
+    if context is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired stream token.")
+
+    base_url, cid, cookie = context
+    uri = f"{base_url}/{name}"
+    if request.url.query:
+        uri = f"{uri}?{request.url.query}"
+    return uri, cid, cookie
+
+
+@router.api_route("/get_ts", methods=["GET", "HEAD"])
 async def get_tts(
+    request: Request,
     uri,
     cid,
     cookie,
     auth_session=Depends(jiotv_auth_verify),
 ):
-    headers = jiotv_obj.request_headers.copy()
-    headers["channelid"] = str(cid)
-    headers["srno"] = "240707144000"
-    headers["cookie"] = cookie
-
-    req = jiotv_obj.client.build_request("GET", uri, headers=headers)
-    resp = await jiotv_obj.client.send(req, stream=True)
-    print("[+] Fetching TS chunk...")
-    print(resp)
-    print("[+] TS chunk... fetched.")
-    return StreamingResponse(
-        resp.aiter_bytes(),
-        media_type="video/MP2T",
-        background=BackgroundTask(resp.aclose),
-    )
+    return await segment_response(request, uri, cid, cookie)
 
 
-@router.get("/get_key")
+@router.api_route("/get_key", methods=["GET", "HEAD"])
 async def get_keys(
+    request: Request,
     uri,
     cid,
     cookie,
     auth_session=Depends(jiotv_auth_verify),
 ):
-    headers = jiotv_obj.request_headers.copy()
-    headers["channelid"] = str(cid)
-    headers["srno"] = "240707144000"
-    headers["cookie"] = cookie
-    headers["Content-type"] = "application/octet-stream"
-
-    req = jiotv_obj.client.build_request("GET", uri, headers=headers)
-    resp = await jiotv_obj.client.send(req, stream=True)
-    print("[+] Fetching Key chunk...")
-    print(resp)
-    print("[+] Key chunk... fetched.")
-    return StreamingResponse(
-        resp.aiter_bytes(),
-        media_type="application/octet-stream",
-        background=BackgroundTask(resp.aclose),
+    return await key_response(request, uri, cid, cookie)
+
+
+@router.api_route("/s/{token}/{name:path}", methods=["GET", "HEAD"])
+async def get_token_segment(
+    request: Request,
+    token: str,
+    name: str,
+    auth_session=Depends(jiotv_auth_verify),
+):
+    """
+    Serves a segment referenced by a short stream token, as emitted in
+    rewritten variant playlists.
+    """
+    return await segment_response(
+        request, *resolve_token_uri(request, token, name), public=True
     )
 
 
+@router.api_route("/k/{token}/{name:path}", methods=["GET", "HEAD"])
+async def get_token_key(
+    request: Request,
+    token: str,
+    name: str,
+    auth_session=Depends(jiotv_auth_verify),
+):
+    """
+    Serves an AES key referenced by a short stream token.
+    """
+    return await key_response(request, *resolve_token_uri(request, token, name))
+
+
 @router.get("/play")
 async def play(
     uri,